@@ -0,0 +1,37 @@
+# Archiving job for Pet Clinic Vaccination Record System
+# Moves old, superseded vaccinations from the hot database into the archive file
+#
+#   python archive_job.py [--db pet_clinic.db] [--archive pet_clinic_archive.db] [--horizon-days 730]
+
+import argparse
+import logging
+import sys
+
+from database import DatabaseManager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Move old vaccinations into the archive database")
+    parser.add_argument('--db', default="pet_clinic.db", help="hot database file")
+    parser.add_argument('--archive', default="pet_clinic_archive.db", help="archive database file")
+    parser.add_argument('--horizon-days', type=int, default=730,
+                        help="archive vaccinations given more than this many days ago")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = DatabaseManager(args.db, archive_path=args.archive)
+    try:
+        moved = db.archive_vaccinations(args.horizon_days)
+        print(f"Archived {moved} vaccination(s); "
+            f"{db.get_vaccination_count()} remain in {args.db}, "
+            f"{db.get_vaccination_count(include_archive=True)} in total")
+        return 0
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# Online backup for Pet Clinic Vaccination Record System
+# Copies the live database with the sqlite3 backup API a few pages at a time,
+# verifies the copy and keeps a rotating set of timestamped backups
+# The archive database, when present, is backed up and rotated alongside it
+#
+#   python backup.py [--db pet_clinic.db] [--archive pet_clinic_archive.db] [--dir backups] [--keep 7]
+#   python backup.py --verify backups/pet_clinic-20240101-120000.db
+
+import argparse
+import glob
+import logging
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class BackupManager:
+    # Creates, verifies and rotates backups of one database file
+    def __init__(self, db_path: str = "pet_clinic.db", backup_dir: str = "backups",
+                keep: int = 7, pages: int = 256, sleep: float = 0.05,
+                archive_path: Optional[str] = None):
+        # pages per backup step (-1 copies everything in one step); sleep seconds between steps
+        # keep is the number of backups left after rotation (0 keeps all)
+        # archive_path is the attached archive database, backed up after db_path
+        if pages == 0:
+            raise ValueError("Pages per step cannot be 0")
+        if keep < 0:
+            raise ValueError("Number of backups to keep cannot be negative")
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self.prefix = os.path.splitext(os.path.basename(db_path))[0]
+        self.archive = (BackupManager(archive_path, backup_dir, keep, pages, sleep)
+                        if archive_path else None)
+
+    def create_backup(self, progress: Optional[Callable[[int, int, int], None]] = None) -> str:
+        # Copy the database into a new timestamped file and return its path
+        # progress(status, remaining, total) is called after every step
+        # Writes from other connections restart the copy at the next step,
+        # so small steps trade a longer backup for a more responsive app
+        if not os.path.exists(self.db_path):
+            raise Exception(f"Database not found: {self.db_path}")
+        os.makedirs(self.backup_dir, exist_ok=True)
+        path = self._new_backup_path()
+        partial = path + ".partial"
+
+        source = None
+        target = None
+        completed = False
+        try:
+            source = sqlite3.connect(self.db_path)
+            target = sqlite3.connect(partial)
+            source.backup(target, pages=self.pages, progress=progress, sleep=self.sleep)
+            # A backup should be one self-contained file, not a WAL pair
+            target.execute("PRAGMA journal_mode = DELETE")
+            problems = self._integrity_problems(target)
+            if problems:
+                raise Exception(f"Backup failed verification: {'; '.join(problems[:5])}")
+            completed = True
+        except sqlite3.Error as e:
+            raise Exception(f"Error backing up database: {e}")
+        finally:
+            if source is not None:
+                source.close()
+            if target is not None:
+                target.close()
+            # Every failure (SQLite error, failed verification, interrupt) drops the partial copy
+            if not completed:
+                self._remove(partial)
+
+        os.replace(partial, path)
+        logger.info("Backed up %s to %s", self.db_path, path)
+        self.rotate()
+        # The archive is copied second: vaccinations archived in between then show up
+        # in both copies rather than in neither
+        if self.archive is not None:
+            if os.path.exists(self.archive.db_path):
+                self.archive.create_backup(progress)
+            else:
+                logger.info("No archive database at %s; skipped", self.archive.db_path)
+        return path
+
+    def verify_backup(self, path: str) -> List[str]:
+        # Run PRAGMA integrity_check on a backup; an empty list means it is sound
+        if not os.path.exists(path):
+            raise Exception(f"Backup not found: {path}")
+        try:
+            connection = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+            try:
+                return self._integrity_problems(connection)
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            return [str(e)]
+
+    def list_backups(self) -> List[str]:
+        # Completed backups of this database, oldest first
+        pattern = os.path.join(self.backup_dir, f"{self.prefix}-*.db")
+        backups = [path for path in glob.glob(pattern) if self._backup_order(path) is not None]
+        return sorted(backups, key=self._backup_order)
+
+    def rotate(self) -> List[str]:
+        # Delete the oldest backups beyond `keep` and return the removed paths
+        backups = self.list_backups()
+        if self.keep == 0 or len(backups) <= self.keep:
+            return []
+        removed = backups[:-self.keep]
+        for path in removed:
+            self._remove(path)
+            logger.info("Removed old backup %s", path)
+        return removed
+
+    def _new_backup_path(self) -> str:
+        # Timestamped file name; a counter keeps names unique within one second
+        stamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+        path = os.path.join(self.backup_dir, f"{self.prefix}-{stamp}.db")
+        counter = 1
+        while os.path.exists(path):
+            path = os.path.join(self.backup_dir, f"{self.prefix}-{stamp}-{counter}.db")
+            counter += 1
+        return path
+
+    def _backup_order(self, path: str) -> Optional[tuple]:
+        # Sort key (timestamp, counter) for "<prefix>-<timestamp>[-<counter>].db", else None
+        match = re.match(rf"^{re.escape(self.prefix)}-(\d{{8}}-\d{{6}})(?:-(\d+))?\.db$",
+                        os.path.basename(path))
+        if match is None:
+            return None
+        return match.group(1), int(match.group(2) or 0)
+
+    def _integrity_problems(self, connection: sqlite3.Connection) -> List[str]:
+        # Rows reported by integrity_check other than the single "ok"
+        rows = [row[0] for row in connection.execute("PRAGMA integrity_check").fetchall()]
+        return [] if rows == ["ok"] else rows
+
+    def _remove(self, path: str):
+        # Delete a file and any journal files SQLite left next to it
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Back up the pet clinic database while it is in use")
+    parser.add_argument('--db', default="pet_clinic.db", help="database file to back up")
+    parser.add_argument('--archive', default="pet_clinic_archive.db",
+                        help="archive database backed up alongside --db (skipped when missing)")
+    parser.add_argument('--dir', default="backups", help="directory holding the backups")
+    parser.add_argument('--keep', type=int, default=7, help="backups to keep (0 keeps all)")
+    parser.add_argument('--pages', type=int, default=256, help="pages copied per step (-1 for all)")
+    parser.add_argument('--sleep', type=float, default=0.05, help="seconds to pause between steps")
+    parser.add_argument('--verify', metavar="BACKUP", help="only run integrity_check on a backup")
+    args = parser.parse_args()
+
+    manager = BackupManager(args.db, args.dir, args.keep, args.pages, args.sleep, args.archive)
+    try:
+        if args.verify:
+            problems = manager.verify_backup(args.verify)
+            for problem in problems:
+                print(problem)
+            print("Backup is sound" if not problems else f"{len(problems)} problem(s) found")
+            return 1 if problems else 0
+
+        def show_progress(status, remaining, total):
+            done = total - remaining
+            print(f"\rCopied {done}/{total} pages ({done * 100 // max(total, 1)}%)", end="", flush=True)
+
+        path = manager.create_backup(show_progress)
+        print(f"\nBackup written to {path}")
+        if manager.archive is not None and os.path.exists(manager.archive.db_path):
+            print(f"Archive backup written to {manager.archive.list_backups()[-1]}")
+        return 0
+    except Exception as e:
+        print(f"\n{e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# Bulk insert id check for Pet Clinic Vaccination Record System
+# Runs create_*_bulk batches with FOREIGN KEY and UNIQUE rejections between valid
+# rows on a throwaway database and checks that every reported id holds the row it
+# was returned for and that exactly the rejected rows are reported as errors.
+# Exits non-zero when any batch gets either wrong.
+#
+#   python bulk_insert_check.py
+
+import os
+import sys
+import tempfile
+from datetime import date
+from typing import Callable
+
+from database import DatabaseManager
+from models import Owner, Pet, VaccineType, Vaccination
+
+
+def batch_failures(label: str, records: list, rejected: list, result: tuple,
+                read: Callable, same: Callable) -> list:
+    # Compare a bulk create's (ids, errors) with the rows that should be rejected
+    ids, errors = result
+    failures = []
+    if [index for index, _ in errors] != rejected or [i for i, row_id in enumerate(ids)
+                                                    if row_id is None] != rejected:
+        failures.append(f"{label}: expected rows {rejected} rejected, got ids {ids}, errors {errors}")
+    for record, row_id in zip(records, ids):
+        if row_id is None:
+            continue
+        stored = read(row_id)
+        if stored is None or not same(record, stored):
+            failures.append(f"{label}: id {row_id} does not hold the row it was reported for")
+    return failures
+
+
+def check(db: DatabaseManager) -> list:
+    # Run every batch and return a list of failure messages
+    owner_id = db.create_owner(Owner(None, "Bulk Check", "555-0100"))
+    vaccine_id = db.create_vaccine_type(VaccineType(None, "Bulk Check Vaccine"))
+    today = date.today().isoformat()
+
+    pets = [
+        Pet(None, "Kept 1", "Dog", owner_id=owner_id, microchip_number="BULK1"),
+        Pet(None, "Orphan", "Dog", owner_id=-1, microchip_number="BULK2"),
+        Pet(None, "Duplicate", "Dog", owner_id=owner_id, microchip_number="BULK1"),
+        Pet(None, "Kept 2", "Dog", owner_id=owner_id, microchip_number="BULK3"),
+        Pet(None, "Orphan", "Dog", owner_id=-1),
+    ]
+    failures = batch_failures(
+        "create_pets_bulk", pets, [1, 2, 4], db.create_pets_bulk(pets, chunk_size=3),
+        db.read_pet, lambda pet, stored: pet.name == stored.name)
+
+    pet_id = db.find_pet_by_microchip("BULK3").pet_id
+    vaccinations = [
+        Vaccination(None, pet_id, vaccine_id, today, batch_number="V1"),
+        Vaccination(None, pet_id, -1, today, batch_number="V2"),
+        Vaccination(None, -1, vaccine_id, today, batch_number="V3"),
+        Vaccination(None, pet_id, vaccine_id, today, batch_number="V4"),
+    ]
+    failures += batch_failures(
+        "create_vaccinations_bulk", vaccinations, [1, 2], db.create_vaccinations_bulk(vaccinations),
+        db.read_vaccination, lambda v, stored: v.batch_number == stored.batch_number)
+
+    owners = [
+        Owner(None, "Bulk Owner 1", "555-0101"),
+        Owner(None, "Bulk Check", "555-0100"),
+        Owner(None, "Bulk Owner 2", "555-0102"),
+    ]
+    failures += batch_failures(
+        "create_owners_bulk", owners, [1], db.create_owners_bulk(owners),
+        db.read_owner, lambda owner, stored: owner.name == stored.name)
+    return failures
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bulk_check.db'))
+        try:
+            failures = check(db)
+        finally:
+            db.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(failures)} bulk insert problem(s)" if failures else "All bulk insert ids are correct")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
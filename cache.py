@@ -0,0 +1,88 @@
+# Read-through cache support for Pet Clinic Vaccination Record System
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+# Invalidation counters are kept per stripe of keys rather than per key, so they
+# take fixed memory; two keys sharing a stripe only cost each other a skipped put
+GENERATION_STRIPES = 1024
+
+
+class LRUCache:
+    # Thread-safe least-recently-used cache with hit/miss counters
+    def __init__(self, max_size: Optional[int] = 1024):
+        # max_size None means unbounded (used for small reference tables)
+        if max_size is not None and max_size < 1:
+            raise ValueError("Cache size must be at least 1")
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = [0] * GENERATION_STRIPES
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        # Return the cached value (marking it most recently used), or None on a miss
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def generation(self, key: Hashable) -> Tuple[int, int]:
+        # Invalidation generation of a key; take it before reading the value from the
+        # source and pass it to put(), which then skips values invalidated meanwhile
+        with self._lock:
+            return self._epoch, self._generations[hash(key) % GENERATION_STRIPES]
+
+    def put(self, key: Hashable, value: Any, generation: Optional[Tuple[int, int]] = None):
+        # Store a value, evicting the least recently used entry when full
+        # With a generation the value is dropped if the key was invalidated (or the
+        # cache cleared) since that generation was taken, as it may be stale
+        with self._lock:
+            if generation is not None and generation != (
+                    self._epoch, self._generations[hash(key) % GENERATION_STRIPES]):
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self._max_size is not None and len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def values(self) -> list:
+        # Snapshot of the cached values
+        with self._lock:
+            return list(self._entries.values())
+
+    def invalidate(self, key: Hashable):
+        # Drop one entry if present
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[hash(key) % GENERATION_STRIPES] += 1
+
+    def clear(self):
+        # Drop every entry (counters are kept)
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        # Counters and occupancy for monitoring
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self._max_size,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,73 @@
+# Connection Pool for Pet Clinic Vaccination Record System
+
+import sqlite3
+import threading
+from queue import LifoQueue, Empty
+from typing import Callable
+
+
+class ConnectionPool:
+    # Hands out sqlite3 connections so each thread works on its own connection
+    def __init__(self, factory: Callable[[], sqlite3.Connection], max_size: int = 5,
+                timeout: float = 30.0):
+        # factory opens a fully configured connection (row factory, PRAGMAs)
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._factory = factory
+        self._max_size = max_size
+        self._timeout = timeout
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        # Number of connections opened by the pool so far
+        return self._created
+
+    def acquire(self) -> sqlite3.Connection:
+        # Check out an idle connection, opening a new one while under max_size
+        if self._closed:
+            raise Exception("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            if self._created < self._max_size:
+                self._created += 1
+                try:
+                    return self._factory()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self._timeout)
+        except Empty:
+            raise Exception("Timed out waiting for a database connection")
+
+    def release(self, connection: sqlite3.Connection):
+        # Return a connection to the pool, discarding any unfinished transaction
+        if self._closed:
+            connection.close()
+            return
+        if connection.in_transaction:
+            connection.rollback()
+        self._idle.put(connection)
+
+    def close_all(self):
+        # Close every idle connection and refuse further checkouts
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
@@ -1,130 +1,554 @@
 # Database Manager for Pet Clinic Vaccination Record System
 
 import sqlite3
-from typing import List, Optional, Tuple
-from models import Pet, Owner, VaccineType, Vaccination
+import logging
+import inspect
+import re
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from itertools import groupby, islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from models import Pet, Owner, VaccineType, Vaccination, VaccinationProtocol
+from connection_pool import ConnectionPool
+from cache import LRUCache
+from instrumentation import QueryStats, InstrumentedCursor, instrument_method
+from write_behind import WriteBehindWriter
+import migrations
 import os
 
+logger = logging.getLogger(__name__)
+
+# PRAGMA performance profiles applied to every connection
+# cache_size < 0 is in KiB, mmap_size in bytes, busy_timeout in milliseconds
+PRAGMA_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -128000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+# Keyset orderings for read_pets_page: key columns and sort direction
+# Each ordering ends with pet_id so the key is unique and backed by an index
+PET_PAGE_ORDERS = {
+    "name": (("name", "pet_id"), "ASC"),
+    "pet_id": (("pet_id",), "ASC"),
+    "registration_date": (("registration_date", "pet_id"), "DESC"),
+}
+
+# Classes of the latest dose of a (pet, vaccine) pair, in due-date order:
+# due date passed, due within the horizon, due later (or no further dose due)
+DUE_STATUSES = ("overdue", "due_soon", "current")
+
+# Days to the next dose when no vaccination protocol covers a dose
+DEFAULT_DUE_INTERVAL_DAYS = 365
+
+# Vaccination columns shared by the hot table and archive.Vaccination
+VACCINATION_COLUMNS = """vaccination_id, pet_id, vaccine_id, vaccination_date, next_due_date,
+    veterinarian_name, batch_number, dose_number, site_administered, adverse_reactions, notes"""
+
+
+class ConcurrencyError(Exception):
+    # Raised by a versioned update when another session changed the row first
+    def __init__(self, table: str, row_id: int, expected: int, current: int):
+        super().__init__(f"{table} {row_id} was changed by another session "
+                        f"(expected version {expected}, found {current})")
+        self.table = table
+        self.row_id = row_id
+        self.expected = expected
+        self.current = current
+
 class DatabaseManager:
-    _instance = None
+    # One instance per database file (a singleton per file rather than per process)
+    _instances = {}
+    _instances_lock = threading.Lock()
     
-    def __new__(cls, db_name: str = "pet_clinic.db"):
-        # Implement Singleton pattern
-        if cls._instance is None:
-            cls._instance = super(DatabaseManager, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    def __new__(cls, db_name: str = "pet_clinic.db", pool_size: int = 0,
+                profile="durable", cache_size: int = 0, archive_path: Optional[str] = None):
+        # Implement Singleton pattern, keyed by database file
+        key = cls._instance_key(db_name)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super(DatabaseManager, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[key] = instance
+        return instance
     
-    def __init__(self, db_name: str = "pet_clinic.db"):
+    @staticmethod
+    def _instance_key(db_name: str) -> str:
+        # Different spellings of the same file share an instance
+        return db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    
+    def __init__(self, db_name: str = "pet_clinic.db", pool_size: int = 0,
+                profile="durable", cache_size: int = 0, archive_path: Optional[str] = None):
         # database connection and create tables
+        # pool_size > 0 enables pooled mode for work off the main thread
+        # profile is a PRAGMA_PROFILES name or a dict overriding "durable" settings
+        # cache_size > 0 caches up to that many owners; vaccine types are then cached in full
+        # archive_path attaches an archive database for old vaccinations on every connection
         if self._initialized:
             return
         
         self.db_name = db_name
-        self.connection = None
-        self.cursor = None
+        self.archive_path = archive_path
+        self.pragmas = self._resolve_profile(profile)
+        self._connection = None
+        self._cursor = None
+        self._local = threading.local()
+        self._pool = None
+        self._owner_cache = LRUCache(cache_size) if cache_size > 0 else None
+        self._vaccine_type_cache = LRUCache(None) if cache_size > 0 else None
+        # Cache generation the full VaccineType table was loaded at (None: not loaded)
+        self._vaccine_types_loaded = None
+        self._stats = None
+        self._writer = None
         self._connect()
+        self._log_profile()
         self._create_tables()
+        self._create_archive_tables()
+        # Change log position the caches are known to be current with
+        self._cache_seq = self.latest_change_seq()
+        if pool_size > 0:
+            self._pool = ConnectionPool(self._pooled_connection, pool_size)
         self._initialized = True
     
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Connection checked out by this thread, else the primary connection
+        bound = getattr(self._local, 'connection', None)
+        return bound if bound is not None else self._connection
+    
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        # Cursor belonging to the connection returned by `connection`
+        bound = getattr(self._local, 'cursor', None)
+        return bound if bound is not None else self._cursor
+    
+    def _open_connection(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        # Open a connection with the standard row factory and PRAGMA setup
+        connection = sqlite3.connect(self.db_name, check_same_thread=check_same_thread)
+        connection.row_factory = sqlite3.Row
+        # busy_timeout first so the journal_mode switch can wait for other writers
+        connection.execute(f"PRAGMA busy_timeout = {int(self.pragmas['busy_timeout'])}")
+        connection.execute(f"PRAGMA journal_mode = {self.pragmas['journal_mode']}")
+        connection.execute(f"PRAGMA synchronous = {self.pragmas['synchronous']}")
+        connection.execute(f"PRAGMA cache_size = {int(self.pragmas['cache_size'])}")
+        connection.execute(f"PRAGMA mmap_size = {int(self.pragmas['mmap_size'])}")
+        connection.execute(f"PRAGMA temp_store = {self.pragmas['temp_store']}")
+        # foreign key support
+        connection.execute("PRAGMA foreign_keys = ON")
+        if self.archive_path:
+            connection.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        return connection
+    
+    def _resolve_profile(self, profile) -> dict:
+        # Build the PRAGMA settings from a profile name or a dict of overrides
+        if isinstance(profile, dict):
+            unknown = set(profile) - set(PRAGMA_PROFILES["durable"])
+            if unknown:
+                raise ValueError(f"Unknown PRAGMA setting(s): {', '.join(sorted(unknown))}")
+            pragmas = dict(PRAGMA_PROFILES["durable"])
+            pragmas.update(profile)
+            return pragmas
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown PRAGMA profile '{profile}', "
+                            f"expected one of: {', '.join(PRAGMA_PROFILES)}")
+        return dict(PRAGMA_PROFILES[profile])
+    
+    def _log_profile(self):
+        # Log the PRAGMA values actually in effect on the primary connection
+        effective = {}
+        for name in self.pragmas:
+            # Some PRAGMAs (mmap_size on :memory:) return no row
+            row = self._cursor.execute(f"PRAGMA {name}").fetchone()
+            effective[name] = row[0] if row else None
+        logger.info("Opened %s with PRAGMA profile: %s", self.db_name,
+                    ", ".join(f"{k}={v}" for k, v in effective.items()))
+    
     def _connect(self):
         # connect database connection
         try:
-            self.connection = sqlite3.connect(self.db_name)
-            self.connection.row_factory = sqlite3.Row
-            self.cursor = self.connection.cursor()
-            # foreign key support
-            self.cursor.execute("PRAGMA foreign_keys = ON")
+            self._connection = self._open_connection()
+            self._cursor = self._new_cursor(self._connection)
         except sqlite3.Error as e:
             raise Exception(f"Database connection error: {e}")
     
-    def _create_tables(self):
-        # Create database tables from schema
-        try:
-            # Read and execute schema file
-            schema_path = os.path.join(os.path.dirname(__file__), 'database_schema.sql')
-            if os.path.exists(schema_path):
-                with open(schema_path, 'r') as f:
-                    schema_sql = f.read()
-                    self.cursor.executescript(schema_sql)
+    def _new_cursor(self, connection: sqlite3.Connection) -> sqlite3.Cursor:
+        # Plain cursor, or a timed one while instrumentation is enabled
+        if self._stats is None:
+            return connection.cursor()
+        cursor = connection.cursor(InstrumentedCursor)
+        cursor.stats = self._stats
+        return cursor
+    
+    def _pooled_connection(self) -> sqlite3.Connection:
+        # Connection factory for the pool; pooled connections may change threads
+        try:
+            return self._open_connection(check_same_thread=False)
+        except sqlite3.Error as e:
+            raise Exception(f"Database connection error: {e}")
+    
+    @contextmanager
+    def checkout(self):
+        # Bind a pooled connection to the current thread for the duration of the block
+        # Every CRUD method called inside the block uses that connection and its own cursor
+        if self._pool is None:
+            raise Exception("Connection pooling is not enabled (pool_size=0)")
+        
+        if getattr(self._local, 'connection', None) is not None:
+            # Nested checkout on the same thread reuses the bound connection
+            yield self
+            return
+        
+        connection = self._pool.acquire()
+        outer_depth = getattr(self._local, 'tx_depth', 0)
+        self._local.connection = connection
+        self._local.cursor = self._new_cursor(connection)
+        self._local.tx_depth = 0
+        try:
+            yield self
+        finally:
+            self._local.cursor.close()
+            self._local.connection = None
+            self._local.cursor = None
+            self._local.tx_depth = outer_depth
+            self._pool.release(connection)
+    
+    @contextmanager
+    def transaction(self):
+        # Unit of work: CRUD methods called inside the block skip their own commit
+        # and the block ends with a single COMMIT, or ROLLBACK if it raises
+        # Nested blocks become SAVEPOINTs that roll back independently
+        # The outermost level takes the write lock up front (BEGIN IMMEDIATE): a deferred
+        # transaction that reads first cannot upgrade to a writer once another connection
+        # has committed, and busy_timeout does not retry that case
+        if self.in_snapshot():
+            raise Exception("Cannot write inside a read snapshot")
+        connection = self.connection
+        depth = getattr(self._local, 'tx_depth', 0)
+        savepoint = f"tx_{depth}"
+        try:
+            if depth == 0:
+                if connection.in_transaction:
+                    # Flush anything left open by an earlier implicit transaction
+                    connection.commit()
+                connection.execute("BEGIN IMMEDIATE")
             else:
-                # Create tables inline if schema file doesn't exist
-                self._create_tables_inline()
-            
-            self.connection.commit()
+                connection.execute(f"SAVEPOINT {savepoint}")
         except sqlite3.Error as e:
-            raise Exception(f"Error creating tables: {e}")
-    
-    def _create_tables_inline(self):
-        # Create tables inline
-        owner_table = """
-        CREATE TABLE IF NOT EXISTS Owner (
-            owner_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT NOT NULL,
-            email TEXT,
-            address TEXT,
-            UNIQUE(name, phone)
-        )
-        """
+            raise Exception(f"Error starting transaction: {e}")
         
-        pet_table = """
-        CREATE TABLE IF NOT EXISTS Pet (
-            pet_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            species TEXT NOT NULL,
-            breed TEXT,
-            date_of_birth DATE,
-            gender TEXT,
-            color TEXT,
-            owner_id INTEGER NOT NULL,
-            microchip_number TEXT UNIQUE,
-            registration_date DATE DEFAULT CURRENT_DATE,
-            notes TEXT,
-            is_active INTEGER DEFAULT 1,
-            FOREIGN KEY (owner_id) REFERENCES Owner(owner_id) ON DELETE CASCADE
-        )
-        """
+        self._local.tx_depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            self._local.tx_depth = depth
+            if depth == 0:
+                connection.rollback()
+                self._flush_invalidations()
+            else:
+                connection.execute(f"ROLLBACK TO {savepoint}")
+                connection.execute(f"RELEASE {savepoint}")
+            raise
         
-        vaccine_type_table = """
-        CREATE TABLE IF NOT EXISTS VaccineType (
-            vaccine_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            vaccine_name TEXT NOT NULL UNIQUE,
-            manufacturer TEXT
-        )
-        """
+        self._local.tx_depth = depth
+        try:
+            if depth == 0:
+                connection.commit()
+            else:
+                connection.execute(f"RELEASE {savepoint}")
+        except sqlite3.Error as e:
+            if depth == 0:
+                connection.rollback()
+            raise Exception(f"Error committing transaction: {e}")
+        finally:
+            if depth == 0:
+                self._flush_invalidations()
+    
+    def in_transaction(self) -> bool:
+        # True while a transaction() block is open on this thread's connection
+        return getattr(self._local, 'tx_depth', 0) > 0
+    
+    @contextmanager
+    def snapshot(self):
+        # Bind a read-only connection holding one long read transaction to this thread
+        # Every read in the block sees the database as it was when the block started,
+        # while other connections keep writing (WAL); the caches are bypassed
+        if getattr(self._local, 'snapshot', False):
+            yield self
+            return
         
-        vaccination_table = """
-        CREATE TABLE IF NOT EXISTS Vaccination (
-            vaccination_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pet_id INTEGER NOT NULL,
-            vaccine_id INTEGER NOT NULL,
-            vaccination_date DATE NOT NULL,
-            next_due_date DATE,
-            veterinarian_name TEXT,
-            batch_number TEXT,
-            dose_number INTEGER,
-            site_administered TEXT,
-            adverse_reactions TEXT,
-            notes TEXT,
-            FOREIGN KEY (pet_id) REFERENCES Pet(pet_id) ON DELETE CASCADE,
-            FOREIGN KEY (vaccine_id) REFERENCES VaccineType(vaccine_id) ON DELETE RESTRICT
-        )
-        """
+        connection = self._open_snapshot()
+        outer = (getattr(self._local, 'connection', None), getattr(self._local, 'cursor', None),
+                getattr(self._local, 'tx_depth', 0))
+        self._local.connection = connection
+        self._local.cursor = self._new_cursor(connection)
+        self._local.tx_depth = 0
+        self._local.snapshot = True
+        try:
+            yield self
+        finally:
+            self._local.cursor.close()
+            connection.rollback()
+            connection.close()
+            self._local.connection, self._local.cursor, self._local.tx_depth = outer
+            self._local.snapshot = False
+    
+    def in_snapshot(self) -> bool:
+        # True inside a snapshot() block on this thread
+        return getattr(self._local, 'snapshot', False)
+    
+    def _open_snapshot(self) -> sqlite3.Connection:
+        # Read-only connection inside a started read transaction
+        # An in-memory database cannot be reopened, so it is copied with the backup API
+        try:
+            if self.db_name == ":memory:":
+                connection = sqlite3.connect(":memory:")
+                self._connection.backup(connection)
+            else:
+                uri = Path(os.path.abspath(self.db_name)).as_uri() + "?mode=ro"
+                connection = sqlite3.connect(uri, uri=True)
+                connection.execute(f"PRAGMA busy_timeout = {int(self.pragmas['busy_timeout'])}")
+                connection.execute(f"PRAGMA cache_size = {int(self.pragmas['cache_size'])}")
+                connection.execute(f"PRAGMA mmap_size = {int(self.pragmas['mmap_size'])}")
+                if self.archive_path:
+                    archive_uri = Path(os.path.abspath(self.archive_path)).as_uri() + "?mode=ro"
+                    connection.execute("ATTACH DATABASE ? AS archive", (archive_uri,))
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA query_only = ON")
+            connection.execute("BEGIN")
+            # The read transaction (and so the snapshot) starts with the first read
+            connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            return connection
+        except sqlite3.Error as e:
+            raise Exception(f"Error opening read snapshot: {e}")
+    
+    def _commit(self):
+        # Commit unless an enclosing transaction() block owns the commit
+        if not self.in_transaction():
+            self.connection.commit()
+    
+    # WRITE-BEHIND
+    
+    def enable_write_behind(self, max_batch: int = 100, max_delay_ms: float = 50.0):
+        # Start a writer thread with its own connection for submit_vaccination
+        # Inserts queued within max_delay_ms of each other (up to max_batch) share
+        # one transaction, so callers no longer wait for a commit per record
+        if self._writer is not None:
+            return
+        if self.db_name == ":memory:":
+            raise Exception("Write-behind needs a database file, not :memory:")
+        try:
+            self._writer = WriteBehindWriter(self._pooled_connection, max_batch, max_delay_ms / 1000)
+        except sqlite3.Error as e:
+            raise Exception(f"Error starting write-behind: {e}")
+    
+    def write_behind_enabled(self) -> bool:
+        return self._writer is not None
+    
+    def flush_writes(self, timeout: Optional[float] = None):
+        # Wait until every insert queued so far is committed (no-op when disabled)
+        if self._writer is not None:
+            self._writer.flush(timeout)
+    
+    def disable_write_behind(self, timeout: Optional[float] = None):
+        # Write what is still queued and stop the writer thread
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close(timeout)
+    
+    # INSTRUMENTATION
+    
+    # Public methods left unwrapped: context managers and the monitoring API itself
+    _UNINSTRUMENTED = {'checkout', 'transaction', 'in_transaction', 'snapshot', 'in_snapshot',
+                        'cache_stats', 'clear_cache', 'close', 'enable_instrumentation',
+                        'disable_instrumentation', 'query_stats', 'dump_query_stats',
+                        'enable_write_behind', 'disable_write_behind', 'write_behind_enabled',
+                        'flush_writes'}
+    
+    def enable_instrumentation(self, slow_query_ms: float = 100.0,
+                                slow_log_size: int = 100) -> QueryStats:
+        # Time every public method and SQL statement from now on
+        # Statements slower than slow_query_ms are logged and kept in a ring buffer
+        if self._stats is not None:
+            self._stats.slow_query_ms = slow_query_ms
+            return self._stats
         
-        self.cursor.execute(owner_table)
-        self.cursor.execute(pet_table)
-        self.cursor.execute(vaccine_type_table)
-        self.cursor.execute(vaccination_table)
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_pet_owner ON Pet(owner_id)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_owner_name ON Owner(name)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_vaccination_pet ON Vaccination(pet_id)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_vaccine_type ON Vaccination(vaccine_id)")
+        self._stats = QueryStats(slow_query_ms, slow_log_size)
+        self._cursor.close()
+        self._cursor = self._new_cursor(self._connection)
+        for name, member in inspect.getmembers(type(self), inspect.isfunction):
+            if name.startswith('_') or name in self._UNINSTRUMENTED:
+                continue
+            setattr(self, name, instrument_method(name, getattr(self, name), self._stats))
+        return self._stats
+    
+    def disable_instrumentation(self):
+        # Remove the method wrappers and timed cursor; recorded stats are discarded
+        if self._stats is None:
+            return
+        for name in list(vars(self)):
+            if not name.startswith('_') and callable(vars(self)[name]):
+                delattr(self, name)
+        self._stats = None
+        self._cursor.close()
+        self._cursor = self._new_cursor(self._connection)
+    
+    def query_stats(self) -> dict:
+        # Per-method and per-statement timings (empty when instrumentation is off)
+        return self._stats.snapshot() if self._stats is not None else {}
+    
+    def dump_query_stats(self, path: str):
+        # Write the timing stats to a JSON file
+        if self._stats is None:
+            raise Exception("Instrumentation is not enabled")
+        self._stats.dump_json(path)
+    
+    # CACHING
+    
+    def cache_stats(self) -> dict:
+        # Hit/miss counters for the owner and vaccine type caches (empty when disabled)
+        if self._owner_cache is None:
+            return {}
+        return {
+            'owners': self._owner_cache.stats(),
+            'vaccine_types': self._vaccine_type_cache.stats()
+        }
+    
+    def clear_cache(self):
+        # Drop every cached entry
+        if self._owner_cache is not None:
+            self._owner_cache.clear()
+            self._vaccine_type_cache.clear()
+            self._vaccine_types_loaded = None
+    
+    def _cacheable(self) -> bool:
+        # Never fill the shared cache with rows read inside an uncommitted transaction,
+        # and never answer snapshot reads from it (the cache may be newer than the snapshot)
+        return (self._owner_cache is not None and not self.in_transaction()
+                and not self.in_snapshot())
+    
+    def _invalidate_owner(self, owner_id: int):
+        # Drop a cached owner after a write (again after the enclosing transaction ends)
+        if self._owner_cache is None:
+            return
+        self._owner_cache.invalidate(owner_id)
+        if self.in_transaction():
+            self._defer_invalidation(lambda: self._owner_cache.invalidate(owner_id))
+    
+    def _invalidate_vaccine_types(self):
+        # Drop the cached vaccine type table after a write
+        if self._vaccine_type_cache is None:
+            return
+        self._reset_vaccine_types()
+        if self.in_transaction():
+            self._defer_invalidation(self._reset_vaccine_types)
+    
+    def _reset_vaccine_types(self):
+        # Forget the fully loaded vaccine type table
+        self._vaccine_types_loaded = None
+        self._vaccine_type_cache.clear()
+    
+    def _defer_invalidation(self, invalidate):
+        # Queue an invalidation to repeat once the transaction commits or rolls back,
+        # so a concurrent reader cannot re-cache the pre-commit row
+        pending = getattr(self._local, 'pending_invalidations', None)
+        if pending is None:
+            pending = self._local.pending_invalidations = []
+        pending.append(invalidate)
+    
+    def _flush_invalidations(self):
+        # Run invalidations deferred by the transaction that just ended
+        pending = getattr(self._local, 'pending_invalidations', None)
+        self._local.pending_invalidations = None
+        for invalidate in pending or []:
+            invalidate()
+    
+    def _vaccine_types_cached(self) -> bool:
+        # True while the table loaded into the cache has not been invalidated since;
+        # writers clear the whole cache, which moves its generation on
+        return self._vaccine_types_loaded == self._vaccine_type_cache.generation(None)
+    
+    def _load_vaccine_types(self):
+        # Read the whole VaccineType table into the cache
+        # Rows read before a concurrent writer cleared the cache are not put back,
+        # and the table then stays unloaded until the next read
+        generation = self._vaccine_type_cache.generation(None)
+        self.cursor.execute("SELECT * FROM VaccineType")
+        for row in self.cursor.fetchall():
+            self._vaccine_type_cache.put(
+                row['vaccine_id'],
+                VaccineType(row['vaccine_id'], row['vaccine_name'], row['manufacturer']),
+                generation
+            )
+        self._vaccine_types_loaded = generation
+    
+    def _create_tables(self):
+        # Bring the schema up to date by applying pending migrations
+        migrations.migrate(self.connection)
+        self.cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'PetSearch')"
+        )
+        self.fts_enabled = bool(self.cursor.fetchone()[0])
+    
+    def _create_archive_tables(self):
+        # Create the archive tables when an archive database is attached
+        if not self.archive_path:
+            return
+        try:
+            for statement in migrations.split_statements(migrations.ARCHIVE_SCHEMA):
+                self.cursor.execute(statement)
+            self.connection.commit()
+        except sqlite3.Error as e:
+            raise Exception(f"Error creating archive tables: {e}")
+    
+    def has_archive(self) -> bool:
+        # True when an archive database is attached
+        return bool(self.archive_path)
+    
+    def _require_archive(self):
+        # Reads that ask for archived rows need an attached archive
+        if not self.archive_path:
+            raise Exception("No archive database attached (archive_path is not set)")
+    
+    def schema_version(self) -> int:
+        # Schema version recorded in PRAGMA user_version
+        return migrations.get_version(self.connection)
     
     def close(self):
-        # Close database connection
-        if self.connection:
-            self.connection.close()
+        # Close database connection and any pooled connections
+        # Queued write-behind inserts are written first
+        # The next DatabaseManager(db_name) then opens the file afresh
+        self.disable_write_behind()
+        if self._pool:
+            self._pool.close_all()
+        if self._connection:
+            self._connection.close()
+        with self._instances_lock:
+            if self._instances.get(self._instance_key(self.db_name)) is self:
+                del self._instances[self._instance_key(self.db_name)]
     
     # OWNER CRUD OPERATIONS 
     
@@ -136,31 +560,70 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?)
             """
             
-            self.cursor.execute(query, (
-                owner.name, owner.phone, owner.email, owner.address
-            ))
+            self.cursor.execute(query, self._owner_params(owner))
             
-            self.connection.commit()
+            self._commit()
             return self.cursor.lastrowid
         except sqlite3.IntegrityError as e:
             raise Exception(f"Owner already exists: {e}")
         except sqlite3.Error as e:
             raise Exception(f"Error creating owner: {e}")
     
+    def create_owners_bulk(self, owners: Iterable[Owner],
+                        chunk_size: int = 1000) -> Tuple[List[Optional[int]], List[Tuple[int, str]]]:
+        # Create many owner records in one transaction
+        # Returns (ids, errors): ids[i] is None for rejected rows, errors holds (index, message)
+        query = """
+        INSERT INTO Owner (name, phone, email, address)
+        VALUES (?, ?, ?, ?)
+        """
+        return self._insert_many(query, (self._owner_params(o) for o in owners),
+                                chunk_size, "Owner", "owners")
+    
     def read_owner(self, owner_id: int) -> Optional[Owner]:
-        # Read an owner record by ID
+        # Read an owner record by ID (through the owner cache when enabled)
         try:
+            generation = None
+            if self._cacheable():
+                cached = self._owner_cache.get(owner_id)
+                if cached is not None:
+                    return Owner(**cached.to_dict())
+                # A writer invalidating the owner after our SELECT makes the put a no-op
+                generation = self._owner_cache.generation(owner_id)
+            
             query = "SELECT * FROM Owner WHERE owner_id = ?"
             self.cursor.execute(query, (owner_id,))
             row = self.cursor.fetchone()
             
             if row:
-                return Owner(row['owner_id'], row['name'], row['phone'], 
-                        row['email'], row['address'])
+                owner = self._row_to_owner(row)
+                if generation is not None:
+                    self._owner_cache.put(owner_id, Owner(**owner.to_dict()), generation)
+                return owner
             return None
         except sqlite3.Error as e:
             raise Exception(f"Error reading owner: {e}")
     
+    def find_owner(self, name: str, phone: str) -> Optional[Owner]:
+        # Look an owner up by (name, phone), ignoring case, punctuation and phone
+        # formatting, so "jane doe / (555) 1234" finds "Jane Doe / 555-1234"
+        # The oldest owner wins when earlier duplicates have not been merged yet
+        try:
+            query = f"""
+            SELECT * FROM Owner
+            WHERE phone_key = {migrations.OWNER_PHONE_KEY.format('?')}
+            AND name_key = {migrations.OWNER_NAME_KEY.format('?')}
+            ORDER BY owner_id LIMIT 1
+            """
+            self.cursor.execute(query, (phone, name))
+            row = self.cursor.fetchone()
+            
+            if row:
+                return self._row_to_owner(row)
+            return None
+        except sqlite3.Error as e:
+            raise Exception(f"Error finding owner: {e}")
+    
     def read_all_owners(self) -> List[Owner]:
         # Read all owner records
         try:
@@ -168,43 +631,159 @@ class DatabaseManager:
             self.cursor.execute(query)
             rows = self.cursor.fetchall()
             
-            owners = []
-            for row in rows:
-                owners.append(Owner(row['owner_id'], row['name'], row['phone'],
-                                row['email'], row['address']))
-            return owners
+            return [self._row_to_owner(row) for row in rows]
         except sqlite3.Error as e:
             raise Exception(f"Error reading owners: {e}")
     
-    def update_owner(self, owner: Owner) -> bool:
+    def iter_all_owners(self, batch_size: int = 500) -> Iterator[Owner]:
+        # Stream all owner records in fetchmany batches on a dedicated cursor
+        return self._iter_rows(
+            "SELECT * FROM Owner ORDER BY name", (), batch_size,
+            self._row_to_owner, "owners"
+        )
+    
+    def update_owner(self, owner: Owner, expected_version: Optional[int] = None) -> bool:
         # Update an existing owner record
+        # The update only applies while the row still has expected_version (default:
+        # the version the owner was read with) and raises ConcurrencyError otherwise;
+        # an owner without a version is updated unconditionally
         try:
+            expected = owner.row_version if expected_version is None else expected_version
             query = """
-            UPDATE Owner SET name = ?, phone = ?, email = ?, address = ?
-            WHERE owner_id = ?
+            UPDATE Owner SET name = ?, phone = ?, email = ?, address = ?,
+                        row_version = row_version + 1
+            WHERE owner_id = ? AND (? IS NULL OR row_version = ?)
             """
             
             self.cursor.execute(query, (
-                owner.name, owner.phone, owner.email, owner.address, owner.owner_id
+                owner.name, owner.phone, owner.email, owner.address, owner.owner_id,
+                expected, expected
             ))
             
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            try:
+                updated = self._versioned_update_result("Owner", "owner_id", owner,
+                                                        owner.owner_id, expected)
+            except ConcurrencyError:
+                # The cached copy is the stale one; the caller will read the owner again
+                self._invalidate_owner(owner.owner_id)
+                raise
+            self._commit()
+            self._invalidate_owner(owner.owner_id)
+            return updated
         except sqlite3.Error as e:
             raise Exception(f"Error updating owner: {e}")
     
     def delete_owner(self, owner_id: int) -> bool:
         # Delete an owner record (pets will cascade delete)
+        # Archived vaccinations of those pets are deleted in the same transaction
         try:
+            if self.archive_path:
+                self.cursor.execute("""
+                DELETE FROM archive.Vaccination
+                WHERE pet_id IN (SELECT pet_id FROM Pet WHERE owner_id = ?)
+                """, (owner_id,))
             query = "DELETE FROM Owner WHERE owner_id = ?"
             self.cursor.execute(query, (owner_id,))
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            deleted = self.cursor.rowcount > 0
+            self._commit()
+            self._invalidate_owner(owner_id)
+            return deleted
         except sqlite3.Error as e:
             raise Exception(f"Error deleting owner: {e}")
     
+    # OWNER DEDUPLICATION
+
+    def iter_owner_blocks(self, key: str = "phone_key") -> Iterator[List[dict]]:
+        # Groups of two or more owners sharing a match key ("phone_key" or "name_key")
+        # Each owner is a dict of its columns plus both keys; groups come in key order
+        if key not in ("phone_key", "name_key"):
+            raise ValueError(f"Unknown owner match key: {key}")
+        query = f"""
+        SELECT owner_id, name, phone, email, address, phone_key, name_key
+        FROM Owner
+        WHERE {key} IN (
+            SELECT {key} FROM Owner WHERE {key} != ''
+            GROUP BY {key} HAVING COUNT(*) > 1
+        )
+        ORDER BY {key}, owner_id
+        """
+        rows = self._iter_rows(query, (), 1000, dict, "owner blocks")
+        return (list(block) for _, block in groupby(rows, key=lambda row: row[key]))
+
+    def merge_owners(self, merges: Iterable[Tuple[int, int]]) -> int:
+        # Merge each (keep_id, duplicate_id) pair in one transaction: pets move to
+        # the kept owner, which also takes over a missing email or address, and the
+        # duplicate is deleted. Chains (a <- b <- c) resolve to the first owner.
+        # Returns the number of owners removed.
+        keep_of = {}
+        for keep_id, duplicate_id in merges:
+            if keep_id == duplicate_id:
+                continue
+            keep_of[duplicate_id] = keep_id
+        resolved = {}
+        for duplicate_id in keep_of:
+            keep_id = keep_of[duplicate_id]
+            seen = {duplicate_id}
+            while keep_id in keep_of:
+                if keep_id in seen:
+                    raise ValueError(f"Owner merges form a cycle through owner {keep_id}")
+                seen.add(keep_id)
+                keep_id = keep_of[keep_id]
+            resolved[duplicate_id] = keep_id
+        if not resolved:
+            return 0
+
+        try:
+            with self.transaction():
+                self.cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS owner_merge (
+                    duplicate_id INTEGER PRIMARY KEY,
+                    keep_id INTEGER NOT NULL
+                )
+                """)
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS temp.idx_owner_merge_keep ON owner_merge(keep_id)"
+                )
+                self.cursor.execute("DELETE FROM temp.owner_merge")
+                self.cursor.executemany(
+                    "INSERT INTO temp.owner_merge (duplicate_id, keep_id) VALUES (?, ?)",
+                    resolved.items()
+                )
+                # Fill a blank email/address on the kept owner from its oldest duplicate
+                fill = """
+                COALESCE(NULLIF({0}, ''), (
+                    SELECT d.{0} FROM temp.owner_merge m
+                    JOIN Owner d ON d.owner_id = m.duplicate_id
+                    WHERE m.keep_id = Owner.owner_id AND d.{0} != ''
+                    ORDER BY d.owner_id LIMIT 1
+                ), {0})
+                """
+                self.cursor.execute(f"""
+                UPDATE Owner SET email = {fill.format('email')}, address = {fill.format('address')},
+                            row_version = row_version + 1
+                WHERE owner_id IN (SELECT keep_id FROM temp.owner_merge)
+                """)
+                self.cursor.execute("""
+                UPDATE Pet SET owner_id = (
+                    SELECT keep_id FROM temp.owner_merge WHERE duplicate_id = Pet.owner_id
+                ), row_version = row_version + 1
+                WHERE owner_id IN (SELECT duplicate_id FROM temp.owner_merge)
+                """)
+                self.cursor.execute("""
+                DELETE FROM Owner
+                WHERE owner_id IN (SELECT duplicate_id FROM temp.owner_merge)
+                """)
+                removed = self.cursor.rowcount
+                self.cursor.execute("DELETE FROM temp.owner_merge")
+            for owner_id in set(resolved) | set(resolved.values()):
+                self._invalidate_owner(owner_id)
+            logger.info("Merged %d duplicate owner(s)", removed)
+            return removed
+        except sqlite3.Error as e:
+            raise Exception(f"Error merging owners: {e}")
+
     #  VACCINE TYPE CRUD OPERATIONS 
-    
+
     def create_vaccine_type(self, vaccine: VaccineType) -> int:
         # Create a new vaccine type record
         try:
@@ -214,8 +793,10 @@ class DatabaseManager:
             """
             
             self.cursor.execute(query, (vaccine.vaccine_name, vaccine.manufacturer))
-            self.connection.commit()
-            return self.cursor.lastrowid
+            vaccine_id = self.cursor.lastrowid
+            self._commit()
+            self._invalidate_vaccine_types()
+            return vaccine_id
         except sqlite3.IntegrityError as e:
             raise Exception(f"Vaccine type already exists: {e}")
         except sqlite3.Error as e:
@@ -223,7 +804,17 @@ class DatabaseManager:
     
     def read_vaccine_type(self, vaccine_id: int) -> Optional[VaccineType]:
         # Read a vaccine type record by ID
+        # With caching the whole (small) table is loaded on the first read
         try:
+            if self._cacheable():
+                cached = self._vaccine_type_cache.get(vaccine_id)
+                if cached is None and not self._vaccine_types_cached():
+                    self._load_vaccine_types()
+                    cached = self._vaccine_type_cache.get(vaccine_id)
+                # A load that lost a race with a writer falls through to the table
+                if cached is not None or self._vaccine_types_cached():
+                    return VaccineType(**cached.to_dict()) if cached else None
+            
             query = "SELECT * FROM VaccineType WHERE vaccine_id = ?"
             self.cursor.execute(query, (vaccine_id,))
             row = self.cursor.fetchone()
@@ -237,6 +828,13 @@ class DatabaseManager:
     def read_all_vaccine_types(self) -> List[VaccineType]:
         # Read all vaccine type records
         try:
+            if self._cacheable():
+                if not self._vaccine_types_cached():
+                    self._load_vaccine_types()
+                if self._vaccine_types_cached():
+                    cached = sorted(self._vaccine_type_cache.values(), key=lambda v: v.vaccine_name)
+                    return [VaccineType(**v.to_dict()) for v in cached]
+            
             query = "SELECT * FROM VaccineType ORDER BY vaccine_name"
             self.cursor.execute(query)
             rows = self.cursor.fetchall()
@@ -257,8 +855,10 @@ class DatabaseManager:
             """
             
             self.cursor.execute(query, (vaccine.vaccine_name, vaccine.manufacturer, vaccine.vaccine_id))
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            updated = self.cursor.rowcount > 0
+            self._commit()
+            self._invalidate_vaccine_types()
+            return updated
         except sqlite3.Error as e:
             raise Exception(f"Error updating vaccine type: {e}")
     
@@ -267,8 +867,10 @@ class DatabaseManager:
         try:
             query = "DELETE FROM VaccineType WHERE vaccine_id = ?"
             self.cursor.execute(query, (vaccine_id,))
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            deleted = self.cursor.rowcount > 0
+            self._commit()
+            self._invalidate_vaccine_types()
+            return deleted
         except sqlite3.Error as e:
             raise Exception(f"Error deleting vaccine type: {e}")
     
@@ -283,19 +885,27 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
             
-            self.cursor.execute(query, (
-                pet.name, pet.species, pet.breed, pet.date_of_birth,
-                pet.gender, pet.color, pet.owner_id, pet.microchip_number,
-                pet.registration_date, pet.notes, pet.is_active
-            ))
+            self.cursor.execute(query, self._pet_params(pet))
             
-            self.connection.commit()
+            self._commit()
             return self.cursor.lastrowid
         except sqlite3.IntegrityError as e:
             raise Exception(f"Integrity error: {e}")
         except sqlite3.Error as e:
             raise Exception(f"Error creating pet: {e}")
     
+    def create_pets_bulk(self, pets: Iterable[Pet],
+                        chunk_size: int = 1000) -> Tuple[List[Optional[int]], List[Tuple[int, str]]]:
+        # Create many pet records in one transaction
+        # Returns (ids, errors): ids[i] is None for rejected rows, errors holds (index, message)
+        query = """
+        INSERT INTO Pet (name, species, breed, date_of_birth, gender, color,
+                    owner_id, microchip_number, registration_date, notes, is_active)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._insert_many(query, (self._pet_params(p) for p in pets),
+                                chunk_size, "Pet", "pets")
+    
     def read_pet(self, pet_id: int) -> Optional[Pet]:
         # Read a pet record by ID
         try:
@@ -309,6 +919,19 @@ class DatabaseManager:
         except sqlite3.Error as e:
             raise Exception(f"Error reading pet: {e}")
     
+    def find_pet_by_microchip(self, microchip_number: str) -> Optional[Pet]:
+        # Look a pet up by its unique microchip number
+        try:
+            query = "SELECT * FROM Pet WHERE microchip_number = ?"
+            self.cursor.execute(query, (microchip_number,))
+            row = self.cursor.fetchone()
+            
+            if row:
+                return self._row_to_pet(row)
+            return None
+        except sqlite3.Error as e:
+            raise Exception(f"Error finding pet: {e}")
+    
     def read_all_pets(self, active_only: bool = True) -> List[Pet]:
         # Read all pet records
         try:
@@ -324,24 +947,116 @@ class DatabaseManager:
         except sqlite3.Error as e:
             raise Exception(f"Error reading pets: {e}")
     
-    def update_pet(self, pet: Pet) -> bool:
-        # Update an existing pet record
+    def iter_all_pets(self, active_only: bool = True, batch_size: int = 500) -> Iterator[Pet]:
+        # Stream all pet records in fetchmany batches on a dedicated cursor
+        if active_only:
+            query = "SELECT * FROM Pet WHERE is_active = 1 ORDER BY name"
+        else:
+            query = "SELECT * FROM Pet ORDER BY name"
+        return self._iter_rows(query, (), batch_size, self._row_to_pet, "pets")
+    
+    def read_pets_with_owners(self, active_only: bool = True) -> List[Tuple[Pet, Optional[Owner]]]:
+        # Read all pets joined with their owner in a single query
         try:
+            query = """
+            SELECT p.*, o.name AS owner_name, o.phone AS owner_phone,
+                o.email AS owner_email, o.address AS owner_address,
+                o.row_version AS owner_row_version
+            FROM Pet p
+            LEFT JOIN Owner o ON p.owner_id = o.owner_id
+            """
+            if active_only:
+                query += " WHERE p.is_active = 1"
+            query += " ORDER BY p.name"
+            
+            self.cursor.execute(query)
+            rows = self.cursor.fetchall()
+            
+            return [(self._row_to_pet(row), self._row_to_joined_owner(row)) for row in rows]
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading pets with owners: {e}")
+    
+    def read_pets_page(self, after_key: Optional[tuple] = None, limit: int = 50,
+                    order_by: str = "name", active_only: bool = True,
+                    include_total: bool = False) -> Tuple[List[Tuple[Pet, Optional[Owner]]], Optional[tuple], Optional[int]]:
+        # Read one page of (pet, owner) pairs using keyset (seek) pagination
+        # Pass the returned next_key as after_key to get the following page;
+        # next_key is None on the last page. total is only counted when include_total is set
+        if order_by not in PET_PAGE_ORDERS:
+            raise ValueError(f"Cannot page pets by '{order_by}', "
+                            f"expected one of: {', '.join(PET_PAGE_ORDERS)}")
+        if limit < 1:
+            raise ValueError("Page limit must be at least 1")
+        
+        columns, direction = PET_PAGE_ORDERS[order_by]
+        key_expr = ", ".join(f"p.{c}" for c in columns)
+        conditions = []
+        params = []
+        if active_only:
+            conditions.append("p.is_active = 1")
+        if after_key is not None:
+            if len(after_key) != len(columns):
+                raise ValueError(f"after_key must have {len(columns)} value(s) for order '{order_by}'")
+            placeholders = ", ".join("?" for _ in columns)
+            comparison = ">" if direction == "ASC" else "<"
+            conditions.append(f"({key_expr}) {comparison} ({placeholders})")
+            params.extend(after_key)
+        
+        try:
+            query = """
+            SELECT p.*, o.name AS owner_name, o.phone AS owner_phone,
+                o.email AS owner_email, o.address AS owner_address,
+                o.row_version AS owner_row_version
+            FROM Pet p
+            LEFT JOIN Owner o ON p.owner_id = o.owner_id
+            """
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY " + ", ".join(f"p.{c} {direction}" for c in columns)
+            query += " LIMIT ?"
+            
+            # Fetch one extra row to know whether another page exists
+            self.cursor.execute(query, params + [limit + 1])
+            rows = self.cursor.fetchall()
+            
+            next_key = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_key = tuple(rows[-1][c] for c in columns)
+            page = [(self._row_to_pet(row), self._row_to_joined_owner(row)) for row in rows]
+            
+            total = None
+            if include_total:
+                count_query = "SELECT COUNT(*) FROM Pet"
+                if active_only:
+                    count_query += " WHERE is_active = 1"
+                self.cursor.execute(count_query)
+                total = self.cursor.fetchone()[0]
+            
+            return page, next_key, total
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading pets page: {e}")
+    
+    def update_pet(self, pet: Pet, expected_version: Optional[int] = None) -> bool:
+        # Update an existing pet record, checking its version like update_owner
+        try:
+            expected = pet.row_version if expected_version is None else expected_version
             query = """
             UPDATE Pet SET name = ?, species = ?, breed = ?, date_of_birth = ?,
                         gender = ?, color = ?, owner_id = ?, microchip_number = ?,
-                        notes = ?, is_active = ?
-            WHERE pet_id = ?
+                        notes = ?, is_active = ?, row_version = row_version + 1
+            WHERE pet_id = ? AND (? IS NULL OR row_version = ?)
             """
             
             self.cursor.execute(query, (
                 pet.name, pet.species, pet.breed, pet.date_of_birth,
-                pet.gender, pet.color, pet.owner_id, pet.microchip_number,
-                pet.notes, pet.is_active, pet.pet_id
+                pet.gender, pet.color, pet.owner_id, pet.microchip_number or None,
+                pet.notes, pet.is_active, pet.pet_id, expected, expected
             ))
             
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            updated = self._versioned_update_result("Pet", "pet_id", pet, pet.pet_id, expected)
+            self._commit()
+            return updated
         except sqlite3.IntegrityError as e:
             raise Exception(f"Integrity error: {e}")
         except sqlite3.Error as e:
@@ -349,10 +1064,13 @@ class DatabaseManager:
     
     def delete_pet(self, pet_id: int) -> bool:
         # Delete a pet record (also deletes associated vaccinations due to CASCADE)
+        # Archived vaccinations have no foreign key and are deleted explicitly
         try:
+            if self.archive_path:
+                self.cursor.execute("DELETE FROM archive.Vaccination WHERE pet_id = ?", (pet_id,))
             query = "DELETE FROM Pet WHERE pet_id = ?"
             self.cursor.execute(query, (pet_id,))
-            self.connection.commit()
+            self._commit()
             return self.cursor.rowcount > 0
         except sqlite3.Error as e:
             raise Exception(f"Error deleting pet: {e}")
@@ -360,31 +1078,77 @@ class DatabaseManager:
     def soft_delete_pet(self, pet_id: int) -> bool:
         # Soft delete a pet
         try:
-            query = "UPDATE Pet SET is_active = 0 WHERE pet_id = ?"
+            query = "UPDATE Pet SET is_active = 0, row_version = row_version + 1 WHERE pet_id = ?"
             self.cursor.execute(query, (pet_id,))
-            self.connection.commit()
+            self._commit()
             return self.cursor.rowcount > 0
         except sqlite3.Error as e:
             raise Exception(f"Error soft deleting pet: {e}")
     
-    def search_pets(self, search_term: str) -> List[Pet]:
-        # Search pets by name, species, or owner name
+    def search_pets(self, search_term: str, limit: Optional[int] = None) -> List[Pet]:
+        # Search pets by name, species, breed, microchip, or owner name
+        return [pet for pet, _ in self.search_pets_with_owners(search_term, limit)]
+    
+    def search_pets_with_owners(self, search_term: str,
+                                limit: Optional[int] = None) -> List[Tuple[Pet, Optional[Owner]]]:
+        # Search pets by name, species, breed, microchip, or owner name, returning each pet with its owner
+        # With FTS5 every word is a prefix match and results are ranked best first
+        return [(pet, owner) for _, pet, owner in self.search_pets_ranked(search_term, limit)]
+    
+    def search_pets_ranked(self, search_term: str,
+                        limit: Optional[int] = None) -> List[Tuple[float, Pet, Optional[Owner]]]:
+        # search_pets_with_owners with each match's rank, lowest (best) first
+        # The rank is the FTS5 bm25 score, or 0.0 for every row without FTS5; results are
+        # ordered by (rank, pet name) so sharded searches can merge them on the same key
         try:
-            query = """
-            SELECT p.* FROM Pet p
-            JOIN Owner o ON p.owner_id = o.owner_id
-            WHERE (p.name LIKE ? OR p.species LIKE ? OR o.name LIKE ?) 
-            AND p.is_active = 1
-            ORDER BY p.name
-            """
-            search_pattern = f"%{search_term}%"
-            self.cursor.execute(query, (search_pattern, search_pattern, search_pattern))
+            if self.fts_enabled:
+                match = self._pet_search_match(search_term)
+                if match is None:
+                    return []
+                query = """
+                SELECT p.*, o.name AS owner_name, o.phone AS owner_phone,
+                    o.email AS owner_email, o.address AS owner_address,
+                    o.row_version AS owner_row_version, s.rank AS search_rank
+                FROM PetSearch s
+                JOIN Pet p ON p.pet_id = s.rowid
+                LEFT JOIN Owner o ON p.owner_id = o.owner_id
+                WHERE PetSearch MATCH ?
+                AND p.is_active = 1
+                ORDER BY s.rank, p.name
+                """
+                params = [match]
+            else:
+                query = """
+                SELECT p.*, o.name AS owner_name, o.phone AS owner_phone,
+                    o.email AS owner_email, o.address AS owner_address,
+                    o.row_version AS owner_row_version, 0.0 AS search_rank
+                FROM Pet p
+                JOIN Owner o ON p.owner_id = o.owner_id
+                WHERE (p.name LIKE ? OR p.species LIKE ? OR p.breed LIKE ?
+                    OR p.microchip_number LIKE ? OR o.name LIKE ?)
+                AND p.is_active = 1
+                ORDER BY p.name
+                """
+                params = [f"%{search_term}%"] * 5
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            
+            self.cursor.execute(query, params)
             rows = self.cursor.fetchall()
             
-            return [self._row_to_pet(row) for row in rows]
+            return [(row['search_rank'], self._row_to_pet(row), self._row_to_joined_owner(row))
+                    for row in rows]
         except sqlite3.Error as e:
             raise Exception(f"Error searching pets: {e}")
     
+    def _pet_search_match(self, search_term: str) -> Optional[str]:
+        # Build an FTS5 query where every word of the search term must match as a prefix
+        words = re.findall(r"\w+", search_term)
+        if not words:
+            return None
+        return " ".join(f'"{word}"*' for word in words)
+    
     #  VACCINATION CRUD OPERATIONS
     
     def create_vaccination(self, vaccination: Vaccination) -> int:
@@ -397,18 +1161,39 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
             
-            self.cursor.execute(query, (
-                vaccination.pet_id, vaccination.vaccine_id, vaccination.vaccination_date,
-                vaccination.next_due_date, vaccination.veterinarian_name, vaccination.batch_number,
-                vaccination.dose_number, vaccination.site_administered,
-                vaccination.adverse_reactions, vaccination.notes
-            ))
+            self.cursor.execute(query, self._vaccination_params(vaccination))
             
-            self.connection.commit()
+            self._commit()
             return self.cursor.lastrowid
         except sqlite3.Error as e:
             raise Exception(f"Error creating vaccination: {e}")
     
+    def submit_vaccination(self, vaccination: Vaccination) -> Future:
+        # Queue a vaccination on the write-behind writer (see enable_write_behind)
+        # Returns at once; the Future resolves to the vaccination_id after the commit
+        if self._writer is None:
+            raise Exception("Write-behind is not enabled")
+        query = """
+        INSERT INTO Vaccination (pet_id, vaccine_id, vaccination_date, next_due_date,
+                            veterinarian_name, batch_number, dose_number,
+                            site_administered, adverse_reactions, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._writer.submit(query, self._vaccination_params(vaccination))
+    
+    def create_vaccinations_bulk(self, vaccinations: Iterable[Vaccination],
+                                chunk_size: int = 1000) -> Tuple[List[Optional[int]], List[Tuple[int, str]]]:
+        # Create many vaccination records in one transaction
+        # Returns (ids, errors): ids[i] is None for rejected rows, errors holds (index, message)
+        query = """
+        INSERT INTO Vaccination (pet_id, vaccine_id, vaccination_date, next_due_date,
+                            veterinarian_name, batch_number, dose_number,
+                            site_administered, adverse_reactions, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._insert_many(query, (self._vaccination_params(v) for v in vaccinations),
+                                chunk_size, "Vaccination", "vaccinations")
+    
     def read_vaccination(self, vaccination_id: int) -> Optional[Vaccination]:
         # Read a vaccination record by ID
         try:
@@ -422,58 +1207,130 @@ class DatabaseManager:
         except sqlite3.Error as e:
             raise Exception(f"Error reading vaccination: {e}")
     
-    def read_vaccinations_by_pet(self, pet_id: int) -> List[Vaccination]:
+    def read_vaccinations_by_pet(self, pet_id: int,
+                                include_archive: bool = False) -> List[Vaccination]:
         # Read all vaccination records for a specific pet
+        # include_archive adds the pet's archived vaccinations
         try:
-            query = "SELECT * FROM Vaccination WHERE pet_id = ? ORDER BY vaccination_date DESC"
-            self.cursor.execute(query, (pet_id,))
+            if include_archive:
+                self._require_archive()
+                query = f"""
+                SELECT {VACCINATION_COLUMNS} FROM Vaccination WHERE pet_id = ?
+                UNION ALL
+                SELECT {VACCINATION_COLUMNS} FROM archive.Vaccination WHERE pet_id = ?
+                ORDER BY vaccination_date DESC
+                """
+                self.cursor.execute(query, (pet_id, pet_id))
+            else:
+                query = "SELECT * FROM Vaccination WHERE pet_id = ? ORDER BY vaccination_date DESC"
+                self.cursor.execute(query, (pet_id,))
             rows = self.cursor.fetchall()
             
             return [self._row_to_vaccination(row) for row in rows]
         except sqlite3.Error as e:
             raise Exception(f"Error reading vaccinations: {e}")
     
-    def read_all_vaccinations(self) -> List[Vaccination]:
-        # Read all vaccination records
+    def read_vaccinations_with_vaccine(self, pet_id: int, include_archive: bool = False
+                                        ) -> List[Tuple[Vaccination, Optional[VaccineType]]]:
+        # Read a pet's vaccinations joined with their vaccine type in a single query
+        # include_archive adds the pet's archived vaccinations
         try:
-            query = "SELECT * FROM Vaccination ORDER BY vaccination_date DESC"
-            self.cursor.execute(query)
+            source = "Vaccination"
+            params = (pet_id,)
+            if include_archive:
+                self._require_archive()
+                source = f"""(
+                SELECT {VACCINATION_COLUMNS} FROM Vaccination WHERE pet_id = ?
+                UNION ALL
+                SELECT {VACCINATION_COLUMNS} FROM archive.Vaccination WHERE pet_id = ?
+            )"""
+                params = (pet_id, pet_id, pet_id)
+            query = f"""
+            SELECT v.*, vt.vaccine_name, vt.manufacturer
+            FROM {source} v
+            LEFT JOIN VaccineType vt ON v.vaccine_id = vt.vaccine_id
+            WHERE v.pet_id = ?
+            ORDER BY v.vaccination_date DESC
+            """
+            self.cursor.execute(query, params)
+            rows = self.cursor.fetchall()
+            
+            return [(self._row_to_vaccination(row), self._row_to_joined_vaccine(row)) for row in rows]
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading vaccinations: {e}")
+    
+    def read_all_vaccinations(self, include_archive: bool = False) -> List[Vaccination]:
+        # Read all vaccination records (plus archived ones with include_archive)
+        try:
+            self.cursor.execute(self._all_vaccinations_query(include_archive))
             rows = self.cursor.fetchall()
             
             return [self._row_to_vaccination(row) for row in rows]
         except sqlite3.Error as e:
             raise Exception(f"Error reading all vaccinations: {e}")
     
-    def update_vaccination(self, vaccination: Vaccination) -> bool:
-        # Update an existing vaccination record
+    def iter_all_vaccinations(self, batch_size: int = 500,
+                            include_archive: bool = False) -> Iterator[Vaccination]:
+        # Stream all vaccination records in fetchmany batches on a dedicated cursor
+        return self._iter_rows(
+            self._all_vaccinations_query(include_archive), (), batch_size,
+            self._row_to_vaccination, "vaccinations"
+        )
+    
+    def _all_vaccinations_query(self, include_archive: bool) -> str:
+        # Every vaccination, newest first, optionally including the archive
+        if not include_archive:
+            return "SELECT * FROM Vaccination ORDER BY vaccination_date DESC"
+        self._require_archive()
+        return f"""
+        SELECT {VACCINATION_COLUMNS} FROM Vaccination
+        UNION ALL
+        SELECT {VACCINATION_COLUMNS} FROM archive.Vaccination
+        ORDER BY vaccination_date DESC
+        """
+    
+    def update_vaccination(self, vaccination: Vaccination,
+                        expected_version: Optional[int] = None) -> bool:
+        # Update an existing vaccination record, checking its version like update_owner
+        # Only the hot table is updated: an archived vaccination returns False
         try:
+            expected = vaccination.row_version if expected_version is None else expected_version
             query = """
             UPDATE Vaccination SET pet_id = ?, vaccine_id = ?, vaccination_date = ?,
                                 next_due_date = ?, veterinarian_name = ?, batch_number = ?,
                                 dose_number = ?, site_administered = ?,
-                                adverse_reactions = ?, notes = ?
-            WHERE vaccination_id = ?
+                                adverse_reactions = ?, notes = ?,
+                                row_version = row_version + 1
+            WHERE vaccination_id = ? AND (? IS NULL OR row_version = ?)
             """
             
             self.cursor.execute(query, (
                 vaccination.pet_id, vaccination.vaccine_id, vaccination.vaccination_date,
                 vaccination.next_due_date, vaccination.veterinarian_name, vaccination.batch_number,
                 vaccination.dose_number, vaccination.site_administered,
-                vaccination.adverse_reactions, vaccination.notes, vaccination.vaccination_id
+                vaccination.adverse_reactions, vaccination.notes, vaccination.vaccination_id,
+                expected, expected
             ))
             
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            updated = self._versioned_update_result("Vaccination", "vaccination_id", vaccination,
+                                                    vaccination.vaccination_id, expected)
+            self._commit()
+            return updated
         except sqlite3.Error as e:
             raise Exception(f"Error updating vaccination: {e}")
     
     def delete_vaccination(self, vaccination_id: int) -> bool:
-        # Delete a vaccination record
+        # Delete a vaccination record (from the archive too when one is attached)
         try:
             query = "DELETE FROM Vaccination WHERE vaccination_id = ?"
             self.cursor.execute(query, (vaccination_id,))
-            self.connection.commit()
-            return self.cursor.rowcount > 0
+            deleted = self.cursor.rowcount
+            if self.archive_path:
+                self.cursor.execute("DELETE FROM archive.Vaccination WHERE vaccination_id = ?",
+                                    (vaccination_id,))
+                deleted += self.cursor.rowcount
+            self._commit()
+            return deleted > 0
         except sqlite3.Error as e:
             raise Exception(f"Error deleting vaccination: {e}")
     
@@ -497,26 +1354,449 @@ class DatabaseManager:
         except sqlite3.Error as e:
             raise Exception(f"Error getting upcoming vaccinations: {e}")
     
+    def get_vaccination_statuses(self, days: int = 30,
+                                statuses: Iterable[str] = ("overdue", "due_soon"),
+                                limit: Optional[int] = None) -> List[Tuple]:
+        # Latest dose of every (pet, vaccine) pair of the active pets, classified as in
+        # DUE_STATUSES with due_soon meaning due within days; superseded doses never show up
+        # Rows are (pet, vaccine, due date, owner, phone, status, pet_id, vaccine_id,
+        # vaccination_date), soonest due first (no due date last), so the first five
+        # columns match get_upcoming_vaccinations
+        wanted = set(statuses)
+        unknown = wanted - set(DUE_STATUSES)
+        if unknown:
+            raise ValueError(f"Unknown vaccination status: {', '.join(sorted(unknown))}")
+        if not wanted:
+            return []
+        horizon = f"+{int(days)} days"
+        # The due-date index is in (next_due_date, pet_id, vaccine_id) order, so a LIMIT
+        # stops early instead of sorting every overdue pair
+        order = "s.next_due_date, s.pet_id, s.vaccine_id"
+        conditions = ["p.is_active = 1"]
+        params = [horizon]
+        # Bound next_due_date so the due-date index skips the statuses not asked for
+        if "current" not in wanted:
+            conditions.append("s.next_due_date <= date('now', ?)")
+            params.append(horizon)
+            if "overdue" not in wanted:
+                conditions.append("s.next_due_date >= date('now')")
+        else:
+            order = "s.next_due_date IS NULL, " + order
+            if "overdue" not in wanted:
+                conditions.append("(s.next_due_date >= date('now') OR s.next_due_date IS NULL)")
+        if "due_soon" not in wanted:
+            conditions.append("(s.next_due_date IS NULL"
+                            " OR s.next_due_date NOT BETWEEN date('now') AND date('now', ?))")
+            params.append(horizon)
+        try:
+            query = f"""
+            SELECT p.name, vt.vaccine_name, s.next_due_date, o.name, o.phone,
+                CASE WHEN s.next_due_date < date('now') THEN 'overdue'
+                    WHEN s.next_due_date <= date('now', ?) THEN 'due_soon'
+                    ELSE 'current' END,
+                s.pet_id, s.vaccine_id, s.vaccination_date
+            FROM VaccinationStatus s
+            JOIN Pet p ON s.pet_id = p.pet_id
+            JOIN VaccineType vt ON s.vaccine_id = vt.vaccine_id
+            JOIN Owner o ON p.owner_id = o.owner_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {order}
+            """
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            self.cursor.execute(query, params)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            raise Exception(f"Error getting vaccination statuses: {e}")
+    
+    def get_vaccination_status_counts(self, days: int = 30) -> dict:
+        # Number of (pet, vaccine) pairs of the active pets in each of DUE_STATUSES
+        try:
+            query = """
+            SELECT CASE WHEN s.next_due_date < date('now') THEN 'overdue'
+                        WHEN s.next_due_date <= date('now', ?) THEN 'due_soon'
+                        ELSE 'current' END AS status,
+                COUNT(*)
+            FROM VaccinationStatus s
+            JOIN Pet p ON s.pet_id = p.pet_id
+            WHERE p.is_active = 1
+            GROUP BY status
+            """
+            self.cursor.execute(query, (f"+{int(days)} days",))
+            counts = dict.fromkeys(DUE_STATUSES, 0)
+            counts.update((status, count) for status, count in self.cursor.fetchall())
+            return counts
+        except sqlite3.Error as e:
+            raise Exception(f"Error counting vaccination statuses: {e}")
+    
+    # VACCINATION PROTOCOLS
+    
+    def save_vaccination_protocol(self, protocol: VaccinationProtocol, recompute: bool = True) -> int:
+        # Create or replace the protocol for (species, vaccine, dose number)
+        # With recompute the due dates of that species and vaccine are rescheduled in the
+        # same transaction; returns the number of vaccinations rescheduled
+        try:
+            with self.transaction():
+                self.cursor.execute("""
+                INSERT INTO VaccinationProtocol (species, vaccine_id, dose_number, interval_days)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(vaccine_id, species, dose_number)
+                DO UPDATE SET interval_days = excluded.interval_days
+                """, (protocol.species, protocol.vaccine_id, protocol.dose_number,
+                    protocol.interval_days))
+                if not recompute:
+                    return 0
+                return self.recompute_due_dates(protocol.species, protocol.vaccine_id)
+        except sqlite3.IntegrityError as e:
+            raise Exception(f"Invalid vaccination protocol: {e}")
+        except sqlite3.Error as e:
+            raise Exception(f"Error saving vaccination protocol: {e}")
+    
+    def read_vaccination_protocols(self, species: Optional[str] = None,
+                                vaccine_id: Optional[int] = None) -> List[VaccinationProtocol]:
+        # Protocols ordered by species, vaccine and dose, optionally for one species/vaccine
+        try:
+            conditions = []
+            params = []
+            if species is not None:
+                conditions.append("species = ?")
+                params.append(species)
+            if vaccine_id is not None:
+                conditions.append("vaccine_id = ?")
+                params.append(vaccine_id)
+            query = "SELECT * FROM VaccinationProtocol"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY species, vaccine_id, dose_number"
+            self.cursor.execute(query, params)
+            return [VaccinationProtocol(row['species'], row['vaccine_id'], row['dose_number'],
+                                        row['interval_days'])
+                    for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading vaccination protocols: {e}")
+    
+    def delete_vaccination_protocol(self, species: str, vaccine_id: int, dose_number: int,
+                                    recompute: bool = True) -> bool:
+        # Delete one protocol; with recompute the doses it covered fall back to the
+        # remaining protocols of that species and vaccine (doses no protocol covers
+        # any more keep their due date)
+        try:
+            with self.transaction():
+                self.cursor.execute("""
+                DELETE FROM VaccinationProtocol
+                WHERE species = ? AND vaccine_id = ? AND dose_number = ?
+                """, (species, vaccine_id, dose_number))
+                deleted = self.cursor.rowcount > 0
+                if deleted and recompute:
+                    self.recompute_due_dates(species, vaccine_id)
+            return deleted
+        except sqlite3.Error as e:
+            raise Exception(f"Error deleting vaccination protocol: {e}")
+    
+    def compute_next_due_date(self, species: str, vaccine_id: Optional[int], dose_number: int,
+                            vaccination_date: str) -> str:
+        # Next due date (YYYY-MM-DD) of a dose given on vaccination_date, from the
+        # protocols; DEFAULT_DUE_INTERVAL_DAYS when none covers it (or no vaccine yet)
+        try:
+            interval = migrations.PROTOCOL_INTERVAL.format('?', '?', '?')
+            self.cursor.execute(
+                f"SELECT date(?, '+' || COALESCE({interval}, ?) || ' days')",
+                (vaccination_date, species, vaccine_id, dose_number, DEFAULT_DUE_INTERVAL_DAYS)
+            )
+            due = self.cursor.fetchone()[0]
+            if due is None:
+                raise ValueError(f"Invalid vaccination date: {vaccination_date}")
+            return due
+        except sqlite3.Error as e:
+            raise Exception(f"Error computing next due date: {e}")
+    
+    def recompute_due_dates(self, species: Optional[str] = None,
+                            vaccine_id: Optional[int] = None) -> int:
+        # Reschedule next_due_date = vaccination_date + protocol interval for every
+        # vaccination (optionally of one species and/or vaccine) that a protocol covers
+        # Set-based: one INSERT ... SELECT stages the changed due dates, one UPDATE
+        # applies them and a few more statements update the trigger-maintained
+        # tables, so 500k rows take seconds. Returns the number rescheduled
+        try:
+            conditions = []
+            params = []
+            if species is not None:
+                conditions.append("p.species = ? COLLATE NOCASE")
+                params.append(species)
+            if vaccine_id is not None:
+                conditions.append("v.vaccine_id = ?")
+                params.append(vaccine_id)
+            where = "WHERE " + " AND ".join(conditions) if conditions else ""
+            interval = migrations.PROTOCOL_INTERVAL.format(
+                'p.species', 'v.vaccine_id', 'COALESCE(v.dose_number, 1)')
+            with self.transaction():
+                self.cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS due_recompute (vaccination_id INTEGER PRIMARY KEY, "
+                    "pet_id INTEGER, vaccine_id INTEGER, is_active INTEGER, old_due_date DATE, "
+                    "next_due_date DATE)"
+                )
+                self.cursor.execute("DELETE FROM temp.due_recompute")
+                # Doses without a protocol get a NULL due date here and are left alone
+                self.cursor.execute(f"""
+                INSERT INTO temp.due_recompute
+                    (vaccination_id, pet_id, vaccine_id, is_active, old_due_date, next_due_date)
+                SELECT vaccination_id, pet_id, vaccine_id, is_active, next_due_date, due_date FROM (
+                    SELECT v.vaccination_id, v.pet_id, v.vaccine_id, p.is_active, v.next_due_date,
+                        date(v.vaccination_date, '+' || {interval} || ' days') AS due_date
+                    FROM Vaccination v
+                    JOIN Pet p ON p.pet_id = v.pet_id
+                    {where}
+                )
+                WHERE due_date IS NOT NULL AND due_date IS NOT next_due_date
+                """, params)
+                # Per-row triggers would cost more than the update itself; BulkWrite
+                # switches them off for this transaction (see migrations.BULK_WRITE_SCHEMA)
+                self.cursor.execute("INSERT INTO BulkWrite (table_name) VALUES ('Vaccination')")
+                self.cursor.execute("""
+                UPDATE Vaccination SET next_due_date = (
+                    SELECT r.next_due_date FROM temp.due_recompute r
+                    WHERE r.vaccination_id = Vaccination.vaccination_id
+                ), row_version = row_version + 1
+                WHERE vaccination_id IN (SELECT vaccination_id FROM temp.due_recompute)
+                """)
+                updated = self.cursor.rowcount
+                self.cursor.execute("""
+                INSERT INTO DueDateStats (due_date, vaccination_count)
+                SELECT due_date, SUM(delta) FROM (
+                    SELECT old_due_date AS due_date, -1 AS delta FROM temp.due_recompute
+                    WHERE is_active = 1 AND old_due_date IS NOT NULL
+                    UNION ALL
+                    SELECT next_due_date, 1 FROM temp.due_recompute WHERE is_active = 1
+                )
+                GROUP BY due_date HAVING SUM(delta) != 0
+                ON CONFLICT(due_date) DO UPDATE SET vaccination_count = vaccination_count + excluded.vaccination_count
+                """)
+                # An upsert driven by the staged rows (CROSS JOIN keeps them the outer
+                # loop): one primary-key seek per rescheduled dose
+                self.cursor.execute("""
+                INSERT INTO VaccinationStatus
+                    (pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date)
+                SELECT s.pet_id, s.vaccine_id, s.vaccination_id, s.vaccination_date,
+                    due_recompute.next_due_date
+                FROM temp.due_recompute
+                CROSS JOIN VaccinationStatus s
+                ON s.pet_id = due_recompute.pet_id AND s.vaccine_id = due_recompute.vaccine_id
+                WHERE s.vaccination_id = due_recompute.vaccination_id
+                ON CONFLICT(pet_id, vaccine_id) DO UPDATE SET next_due_date = excluded.next_due_date
+                """)
+                self.cursor.execute("""
+                INSERT INTO ChangeLog (table_name, row_id, op)
+                SELECT 'Vaccination', vaccination_id, 'UPDATE' FROM temp.due_recompute
+                ORDER BY vaccination_id
+                """)
+                self.cursor.execute("DELETE FROM BulkWrite WHERE table_name = 'Vaccination'")
+                self.cursor.execute("DELETE FROM temp.due_recompute")
+            logger.info("Rescheduled %d vaccination due date(s)", updated)
+            return updated
+        except sqlite3.Error as e:
+            raise Exception(f"Error recomputing due dates: {e}")
+    
     # STATISTICS AND REPORTS 
     
     def get_pet_count(self) -> int:
-        # Get total number of active pets
+        # Get total number of active pets (trigger-maintained counter)
         try:
-            query = "SELECT COUNT(*) FROM Pet WHERE is_active = 1"
+            query = "SELECT value FROM ClinicStats WHERE stat_name = 'active_pets'"
             self.cursor.execute(query)
             return self.cursor.fetchone()[0]
         except sqlite3.Error as e:
             raise Exception(f"Error getting pet count: {e}")
     
-    def get_vaccination_count(self) -> int:
-        # Get total number of vaccinations
+    def get_vaccination_count(self, include_archive: bool = False) -> int:
+        # Get total number of vaccinations (trigger-maintained counter)
+        # include_archive adds the archived vaccinations
         try:
-            query = "SELECT COUNT(*) FROM Vaccination"
+            query = "SELECT value FROM ClinicStats WHERE stat_name = 'vaccinations'"
             self.cursor.execute(query)
-            return self.cursor.fetchone()[0]
+            count = self.cursor.fetchone()[0]
+            if include_archive:
+                self._require_archive()
+                self.cursor.execute("SELECT COUNT(*) FROM archive.Vaccination")
+                count += self.cursor.fetchone()[0]
+            return count
         except sqlite3.Error as e:
             raise Exception(f"Error getting vaccination count: {e}")
     
+    def get_upcoming_vaccination_count(self, days: int = 30) -> int:
+        # Count vaccinations due within specified days, matching get_upcoming_vaccinations
+        try:
+            query = """
+            SELECT COALESCE(SUM(vaccination_count), 0) FROM DueDateStats
+            WHERE due_date >= date('now')
+            AND due_date <= date('now', '+' || ? || ' days')
+            """
+            self.cursor.execute(query, (days,))
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            raise Exception(f"Error getting upcoming vaccination count: {e}")
+    
+    def get_dashboard_stats(self, days: int = 30) -> dict:
+        # Dashboard card values from the counter tables in one round trip
+        try:
+            query = """
+            SELECT
+                (SELECT value FROM ClinicStats WHERE stat_name = 'active_pets'),
+                (SELECT value FROM ClinicStats WHERE stat_name = 'vaccinations'),
+                (SELECT COALESCE(SUM(vaccination_count), 0) FROM DueDateStats
+                WHERE due_date >= date('now')
+                AND due_date <= date('now', '+' || ? || ' days'))
+            """
+            self.cursor.execute(query, (days,))
+            row = self.cursor.fetchone()
+            return {
+                'pet_count': row[0],
+                'vaccination_count': row[1],
+                'upcoming_count': row[2]
+            }
+        except sqlite3.Error as e:
+            raise Exception(f"Error getting dashboard statistics: {e}")
+    
+    def rebuild_stats(self):
+        # Recompute the counter tables and VaccinationStatus from scratch (backfill or repair)
+        try:
+            with self.transaction():
+                for statement in migrations.CLINIC_STATS_REBUILD + migrations.VACCINATION_STATUS_REBUILD:
+                    self.cursor.execute(statement)
+        except sqlite3.Error as e:
+            raise Exception(f"Error rebuilding statistics: {e}")
+    
+    # ARCHIVING
+    
+    def archive_vaccinations(self, horizon_days: int = 730) -> int:
+        # Move vaccinations given more than horizon_days ago into the archive database
+        # Only past-due doses superseded by a later dose of the same vaccine move, so
+        # the hot table keeps each pet's current doses for the due-date queries
+        self._require_archive()
+        if horizon_days < 0:
+            raise ValueError("Archive horizon cannot be negative")
+        try:
+            with self.transaction():
+                self.cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS archive_batch (vaccination_id INTEGER PRIMARY KEY)"
+                )
+                self.cursor.execute("DELETE FROM temp.archive_batch")
+                self.cursor.execute("""
+                INSERT INTO temp.archive_batch (vaccination_id)
+                SELECT v.vaccination_id FROM Vaccination v
+                WHERE v.vaccination_date < date('now', ?)
+                AND (v.next_due_date IS NULL OR v.next_due_date < date('now'))
+                AND EXISTS (
+                    SELECT 1 FROM Vaccination later
+                    WHERE later.pet_id = v.pet_id AND later.vaccine_id = v.vaccine_id
+                    AND later.vaccination_date > v.vaccination_date
+                )
+                """, (f"-{int(horizon_days)} days",))
+                # REPLACE keeps a re-run idempotent if an earlier run copied but did not delete
+                self.cursor.execute(f"""
+                INSERT OR REPLACE INTO archive.Vaccination ({VACCINATION_COLUMNS})
+                SELECT {VACCINATION_COLUMNS} FROM Vaccination
+                WHERE vaccination_id IN (SELECT vaccination_id FROM temp.archive_batch)
+                """)
+                self.cursor.execute("""
+                DELETE FROM Vaccination
+                WHERE vaccination_id IN (SELECT vaccination_id FROM temp.archive_batch)
+                """)
+                moved = self.cursor.rowcount
+                self.cursor.execute("DELETE FROM temp.archive_batch")
+            logger.info("Archived %d vaccination(s) older than %d days", moved, horizon_days)
+            return moved
+        except sqlite3.Error as e:
+            raise Exception(f"Error archiving vaccinations: {e}")
+    
+    # CHANGE LOG
+    
+    def changes_since(self, seq: int = 0, limit: Optional[int] = 1000,
+                    tables: Optional[Iterable[str]] = None) -> List[dict]:
+        # Changes recorded after seq, oldest first: dicts with seq, table, row_id, op, changed_at
+        # Pass the last seq seen back in to page through the log
+        try:
+            query = "SELECT seq, table_name, row_id, op, changed_at FROM ChangeLog WHERE seq > ?"
+            params = [seq]
+            if tables is not None:
+                tables = list(tables)
+                query += f" AND table_name IN ({', '.join('?' * len(tables))})"
+                params.extend(tables)
+            query += " ORDER BY seq"
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            self.cursor.execute(query, params)
+            return [{
+                'seq': row['seq'],
+                'table': row['table_name'],
+                'row_id': row['row_id'],
+                'op': row['op'],
+                'changed_at': row['changed_at']
+            } for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading change log: {e}")
+    
+    def latest_change_seq(self) -> int:
+        # Sequence number of the newest change (0 when nothing has changed yet)
+        # Read from sqlite_sequence so it survives prune_changes emptying the log
+        try:
+            self.cursor.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'ChangeLog'"
+            )
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading change log: {e}")
+    
+    def changes_pruned_since(self, seq: int) -> bool:
+        # True when entries after seq were pruned before this consumer read them,
+        # so it cannot rely on changes_since(seq) and must reload everything
+        try:
+            self.cursor.execute("SELECT MIN(seq) FROM ChangeLog")
+            oldest = self.cursor.fetchone()[0]
+            if oldest is None:
+                return self.latest_change_seq() > seq
+            return oldest > seq + 1
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading change log: {e}")
+    
+    def prune_changes(self, before_seq: int) -> int:
+        # Delete change log entries up to and including before_seq once every consumer has them
+        try:
+            self.cursor.execute("DELETE FROM ChangeLog WHERE seq <= ?", (before_seq,))
+            self._commit()
+            return self.cursor.rowcount
+        except sqlite3.Error as e:
+            raise Exception(f"Error pruning change log: {e}")
+    
+    def sync_cache(self) -> int:
+        # Invalidate cached owners and vaccine types changed by other connections or
+        # processes since the last sync; returns the number of changes applied
+        if self._owner_cache is None:
+            return 0
+        latest = self.latest_change_seq()
+        if self.changes_pruned_since(self._cache_seq):
+            # Another process pruned changes this cache never saw
+            self.clear_cache()
+            applied = latest - self._cache_seq
+            self._cache_seq = latest
+            return applied
+        applied = 0
+        while True:
+            changes = self.changes_since(self._cache_seq, tables=("Owner", "VaccineType"))
+            if not changes:
+                break
+            for change in changes:
+                if change['table'] == "Owner":
+                    self._owner_cache.invalidate(change['row_id'])
+                else:
+                    self._reset_vaccine_types()
+            self._cache_seq = changes[-1]['seq']
+            applied += len(changes)
+        # Skip past other tables' entries so the next sync starts from here
+        self._cache_seq = max(self._cache_seq, latest)
+        return applied
+    
     def get_species_distribution(self) -> List[Tuple]:
         # Get distribution of pets by species
         try:
@@ -532,8 +1812,144 @@ class DatabaseManager:
         except sqlite3.Error as e:
             raise Exception(f"Error getting species distribution: {e}")
     
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        # Return the EXPLAIN QUERY PLAN detail lines for a statement
+        try:
+            self.cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            return [row['detail'] for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            raise Exception(f"Error explaining query: {e}")
+    
     # HELPER METHODS
     
+    def _insert_many(self, query: str, rows: Iterable[tuple], chunk_size: int,
+                    table: str, label: str) -> Tuple[List[Optional[int]], List[Tuple[int, str]]]:
+        # Stream rows through executemany in chunks inside a single transaction
+        # A constraint violation only aborts the offending statement, so the rows
+        # before it stay inserted and executemany resumes right after it
+        # (no per-chunk SAVEPOINT: inside one every trigger-fed write needs a
+        # statement journal, which made bulk inserts several times slower)
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        
+        ids = []
+        errors = []
+        rows = iter(rows)
+        fed = [0]
+        
+        def feed(batch):
+            # Count the rows executemany has pulled to locate a failing one
+            for row in batch:
+                fed[0] += 1
+                yield row
+        
+        try:
+            with self.transaction():
+                cursor = self.cursor
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    position = 0
+                    while position < len(chunk):
+                        fed[0] = 0
+                        try:
+                            cursor.executemany(query, feed(islice(chunk, position, None)))
+                            inserted, failure = fed[0], None
+                        except sqlite3.IntegrityError as e:
+                            inserted, failure = fed[0] - 1, e
+                        if inserted:
+                            # AUTOINCREMENT keys are contiguous for one writer inside one transaction
+                            # A row rejected by a FOREIGN KEY check was inserted before the statement
+                            # aborted, so last_insert_rowid() would report its rolled-back key; the
+                            # sqlite_sequence bump is rolled back with it and stays exact
+                            if failure is None:
+                                cursor.execute("SELECT last_insert_rowid()")
+                            else:
+                                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?",
+                                            (table,))
+                            last_id = cursor.fetchone()[0]
+                            ids.extend(range(last_id - inserted + 1, last_id + 1))
+                        position += inserted
+                        if failure is not None:
+                            ids.append(None)
+                            errors.append((len(ids) - 1, str(failure)))
+                            position += 1
+            return ids, errors
+        except sqlite3.Error as e:
+            raise Exception(f"Error bulk creating {label}: {e}")
+    
+    def _iter_rows(self, query: str, params: tuple, batch_size: int,
+                convert: Callable, label: str) -> Iterator:
+        # Generator over query results that holds at most batch_size rows in memory
+        # Uses its own cursor so other CRUD calls can run while the caller iterates
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        
+        def generate():
+            cursor = self._new_cursor(self.connection)
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield convert(row)
+            except sqlite3.Error as e:
+                raise Exception(f"Error reading {label}: {e}")
+            finally:
+                cursor.close()
+        
+        return generate()
+    
+    def _owner_params(self, owner: Owner) -> tuple:
+        # INSERT parameters for an Owner
+        return (owner.name, owner.phone, owner.email, owner.address)
+    
+    def _pet_params(self, pet: Pet) -> tuple:
+        # INSERT parameters for a Pet (a blank microchip is stored as NULL so it stays unique)
+        return (
+            pet.name, pet.species, pet.breed, pet.date_of_birth,
+            pet.gender, pet.color, pet.owner_id, pet.microchip_number or None,
+            pet.registration_date, pet.notes, pet.is_active
+        )
+    
+    def _vaccination_params(self, vaccination: Vaccination) -> tuple:
+        # INSERT parameters for a Vaccination
+        return (
+            vaccination.pet_id, vaccination.vaccine_id, vaccination.vaccination_date,
+            vaccination.next_due_date, vaccination.veterinarian_name, vaccination.batch_number,
+            vaccination.dose_number, vaccination.site_administered,
+            vaccination.adverse_reactions, vaccination.notes
+        )
+    
+    def _versioned_update_result(self, table: str, id_column: str, record, row_id: int,
+                                expected: Optional[int]) -> bool:
+        # Outcome of a versioned UPDATE that was just executed on self.cursor
+        # On success the record takes the new version; a row that still exists but
+        # kept its version was changed concurrently and raises ConcurrencyError
+        if self.cursor.rowcount > 0:
+            if expected is not None:
+                record.row_version = expected + 1
+            return True
+        if expected is None:
+            return False
+        self.cursor.execute(f"SELECT row_version FROM {table} WHERE {id_column} = ?", (row_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return False
+        if not self.in_transaction():
+            # The no-op UPDATE opened an implicit write transaction; end it so the
+            # write lock is not held until some later commit
+            self.connection.rollback()
+        raise ConcurrencyError(table, row_id, expected, row['row_version'])
+    
+    def _row_to_owner(self, row) -> Owner:
+        # Convert database row to Owner object
+        return Owner(row['owner_id'], row['name'], row['phone'], row['email'], row['address'],
+                    row_version=row['row_version'])
+    
     def _row_to_pet(self, row) -> Pet:
         # Convert database row to Pet object
         return Pet(
@@ -548,9 +1964,24 @@ class DatabaseManager:
             microchip_number=row['microchip_number'] or "",
             registration_date=row['registration_date'] or "",
             notes=row['notes'] or "",
-            is_active=row['is_active']
+            is_active=row['is_active'],
+            row_version=row['row_version']
         )
     
+    def _row_to_joined_owner(self, row) -> Optional[Owner]:
+        # Convert the owner_* columns of a Pet/Owner join to an Owner object
+        if row['owner_name'] is None:
+            return None
+        return Owner(row['owner_id'], row['owner_name'], row['owner_phone'],
+                    row['owner_email'], row['owner_address'],
+                    row_version=row['owner_row_version'])
+    
+    def _row_to_joined_vaccine(self, row) -> Optional[VaccineType]:
+        # Convert the vaccine columns of a Vaccination/VaccineType join to a VaccineType object
+        if row['vaccine_name'] is None:
+            return None
+        return VaccineType(row['vaccine_id'], row['vaccine_name'], row['manufacturer'])
+    
     def _row_to_vaccination(self, row) -> Vaccination:
         # Convert database row to Vaccination object
         return Vaccination(
@@ -564,5 +1995,7 @@ class DatabaseManager:
             dose_number=row['dose_number'] or 1,
             site_administered=row['site_administered'] or "",
             adverse_reactions=row['adverse_reactions'] or "",
-            notes=row['notes'] or ""
+            notes=row['notes'] or "",
+            # Archived rows (and the hot/archive union) carry no version
+            row_version=row['row_version'] if 'row_version' in row.keys() else None
         )
@@ -0,0 +1,121 @@
+# Owner deduplication for Pet Clinic Vaccination Record System
+# Finds owners entered more than once ("Jane Doe / 555-1234" and "jane doe / (555) 1234")
+# and merges them. Candidates are only compared inside blocks of owners sharing the
+# indexed phone_key or name_key columns, never all pairs, so 100k owners take seconds.
+#
+#   python dedup.py [--db pet_clinic.db] [--threshold 0.9]
+#   python dedup.py --merge            # apply every suggestion at or above the threshold
+
+import argparse
+import logging
+import sys
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, NamedTuple
+
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Name similarity counts for more than phone similarity: family members often
+# share a phone number, while one person rarely has two names
+NAME_WEIGHT = 0.6
+PHONE_WEIGHT = 0.4
+
+
+class MergeSuggestion(NamedTuple):
+    # Two owners that look like the same person; keep_id is the older record
+    keep_id: int
+    duplicate_id: int
+    score: float
+    keep_name: str
+    duplicate_name: str
+    keep_phone: str
+    duplicate_phone: str
+
+
+def similarity(a: str, b: str) -> float:
+    # 0..1 similarity of two normalized keys
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score_pair(first: dict, second: dict) -> float:
+    # Weighted name and phone similarity of two owner rows from iter_owner_blocks
+    return (NAME_WEIGHT * similarity(first['name_key'], second['name_key']) +
+            PHONE_WEIGHT * similarity(first['phone_key'], second['phone_key']))
+
+
+class OwnerDeduplicator:
+    # Produces merge suggestions for one database and applies the accepted ones
+    def __init__(self, db: DatabaseManager, threshold: float = 0.9, max_block_size: int = 200):
+        # threshold is the minimum score (0..1) for a suggestion
+        # Blocks larger than max_block_size (a shared clinic phone, a very common name)
+        # are skipped with a warning rather than compared pairwise
+        if not 0 < threshold <= 1:
+            raise ValueError("Threshold must be between 0 and 1")
+        self.db = db
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+
+    def find_duplicates(self) -> List[MergeSuggestion]:
+        # Suggestions from both blocking keys, best score first
+        best: Dict[tuple, MergeSuggestion] = {}
+        for key in ("phone_key", "name_key"):
+            for block in self.db.iter_owner_blocks(key):
+                if len(block) > self.max_block_size:
+                    logger.warning("Skipping %d owners sharing %s %r", len(block), key, block[0][key])
+                    continue
+                for suggestion in self._score_block(block):
+                    pair = (suggestion.keep_id, suggestion.duplicate_id)
+                    if pair not in best or best[pair].score < suggestion.score:
+                        best[pair] = suggestion
+        return sorted(best.values(), key=lambda s: (-s.score, s.keep_id, s.duplicate_id))
+
+    def _score_block(self, block: List[dict]) -> Iterable[MergeSuggestion]:
+        # Compare every pair inside one block (rows are ordered by owner_id)
+        for i, keep in enumerate(block):
+            for duplicate in block[i + 1:]:
+                score = score_pair(keep, duplicate)
+                if score >= self.threshold:
+                    yield MergeSuggestion(keep['owner_id'], duplicate['owner_id'], round(score, 3),
+                                        keep['name'], duplicate['name'],
+                                        keep['phone'], duplicate['phone'])
+
+    def merge(self, suggestions: Iterable[MergeSuggestion]) -> int:
+        # Merge the given suggestions in one transaction; returns owners removed
+        return self.db.merge_owners((s.keep_id, s.duplicate_id) for s in suggestions)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Find and merge duplicate owners")
+    parser.add_argument('--db', default="pet_clinic.db", help="database file")
+    parser.add_argument('--threshold', type=float, default=0.9, help="minimum match score (0-1)")
+    parser.add_argument('--max-block-size', type=int, default=200,
+                        help="skip blocks with more owners than this")
+    parser.add_argument('--merge', action='store_true', help="merge every suggestion found")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = DatabaseManager(args.db)
+    try:
+        deduplicator = OwnerDeduplicator(db, args.threshold, args.max_block_size)
+        suggestions = deduplicator.find_duplicates()
+        for s in suggestions:
+            print(f"{s.score:.3f}  keep #{s.keep_id} {s.keep_name} / {s.keep_phone}"
+                f"  <-  #{s.duplicate_id} {s.duplicate_name} / {s.duplicate_phone}")
+        print(f"{len(suggestions)} merge suggestion(s)")
+        if args.merge and suggestions:
+            print(f"Merged {deduplicator.merge(suggestions)} duplicate owner(s)")
+        return 0
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
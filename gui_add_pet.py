@@ -4,10 +4,9 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from tkcalendar import DateEntry
-from models import Pet, Owner
+from models import Pet, Owner, validate_email, validate_phone
 from database import DatabaseManager
 from datetime import datetime
-import re
 
 class AddPetWindow(ctk.CTkToplevel):
     # Add Pet Window class
@@ -184,20 +183,6 @@ class AddPetWindow(ctk.CTkToplevel):
         )
         self.cancel_btn.grid(row=0, column=1, padx=10)
     
-    def _validate_email(self, email: str) -> bool:
-        # Validate email format
-        if not email:
-            return True  # Email is optional
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
-    
-    def _validate_phone(self, phone: str) -> bool:
-        # Validate phone number
-        if not phone.strip():
-            return False
-        # Allow various phone formats
-        return len(phone.strip()) >= 7
-    
     def _validate_form(self) -> tuple[bool, str]:
         # Validate form
         # Pet name
@@ -213,12 +198,12 @@ class AddPetWindow(ctk.CTkToplevel):
             return False, "Owner name is required"
         
         # Owner phone
-        if not self._validate_phone(self.owner_phone_entry.get()):
+        if not validate_phone(self.owner_phone_entry.get()):
             return False, "Valid owner phone is required"
         
         # Owner email (if provided)
         email = self.owner_email_entry.get().strip()
-        if email and not self._validate_email(email):
+        if email and not validate_email(email):
             return False, "Invalid email format"
         
         return True, ""
@@ -244,24 +229,28 @@ class AddPetWindow(ctk.CTkToplevel):
                 address=owner_address
             )
             
-            owner_id = self.db.create_owner(owner)
-            
-            # Create Pet object with owner_id
-            pet = Pet(
-                name=self.name_entry.get().strip(),
-                species=self.species_var.get(),
-                breed=self.breed_entry.get().strip(),
-                date_of_birth=self.dob_entry.get_date().strftime("%Y-%m-%d"),
-                gender=self.gender_var.get(),
-                color=self.color_entry.get().strip(),
-                owner_id=owner_id,
-                microchip_number=self.microchip_entry.get().strip(),
-                registration_date=datetime.now().strftime("%Y-%m-%d"),
-                notes=self.notes_entry.get("1.0", "end-1c").strip()
-            )
-            
-            # Save to database
-            pet_id = self.db.create_pet(pet)
+            # Owner and pet are saved together or not at all
+            with self.db.transaction():
+                # Reuse the owner when the same name and phone are already registered
+                existing = self.db.find_owner(owner.name, owner.phone)
+                owner_id = existing.owner_id if existing else self.db.create_owner(owner)
+                
+                # Create Pet object with owner_id
+                pet = Pet(
+                    name=self.name_entry.get().strip(),
+                    species=self.species_var.get(),
+                    breed=self.breed_entry.get().strip(),
+                    date_of_birth=self.dob_entry.get_date().strftime("%Y-%m-%d"),
+                    gender=self.gender_var.get(),
+                    color=self.color_entry.get().strip(),
+                    owner_id=owner_id,
+                    microchip_number=self.microchip_entry.get().strip(),
+                    registration_date=datetime.now().strftime("%Y-%m-%d"),
+                    notes=self.notes_entry.get("1.0", "end-1c").strip()
+                )
+                
+                # Save to database
+                pet_id = self.db.create_pet(pet)
             
             messagebox.showinfo(
                 "Success",
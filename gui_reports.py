@@ -9,6 +9,8 @@ import os
 
 # Reports Window class
 class ReportsWindow(ctk.CTkToplevel):
+    PAGE_SIZE = 50
+    
     def __init__(self, parent, db: DatabaseManager, report_gen: ReportGenerator):
         super().__init__(parent)
         
@@ -139,8 +141,12 @@ class ReportsWindow(ctk.CTkToplevel):
     
     def _generate_pet_report(self):
         # Generate individual pet report
-        # Get all pets
-        pets = self.db.read_all_pets()
+        # Get the first page of pets; more are loaded on demand
+        try:
+            pets, next_key, _ = self.db.read_pets_page(limit=self.PAGE_SIZE)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading pets: {str(e)}")
+            return
         
         if not pets:
             messagebox.showwarning("No Pets", "No pets found in the system")
@@ -165,28 +171,47 @@ class ReportsWindow(ctk.CTkToplevel):
         list_frame = ctk.CTkScrollableFrame(select_window, height=250)
         list_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         
-        for pet in pets:
-            pet_frame = ctk.CTkFrame(list_frame)
-            pet_frame.pack(fill="x", padx=5, pady=3)
-            
-            info = f"{pet.name} (ID: {pet.pet_id}) - {pet.species}"
-            if pet.breed:
-                info += f" - {pet.breed}"
-            
-            pet_label = ctk.CTkLabel(
-                pet_frame,
-                text=info,
-                anchor="w"
-            )
-            pet_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
+        def add_pets(page, key):
+            # Add a page of pets, followed by a "Load more" button while pages remain
+            for pet, _ in page:
+                pet_frame = ctk.CTkFrame(list_frame)
+                pet_frame.pack(fill="x", padx=5, pady=3)
+                
+                info = f"{pet.name} (ID: {pet.pet_id}) - {pet.species}"
+                if pet.breed:
+                    info += f" - {pet.breed}"
+                
+                pet_label = ctk.CTkLabel(
+                    pet_frame,
+                    text=info,
+                    anchor="w"
+                )
+                pet_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
+                
+                select_btn = ctk.CTkButton(
+                    pet_frame,
+                    text="Generate",
+                    width=100,
+                    command=lambda p=pet: self._do_generate_pet_report(p, select_window)
+                )
+                select_btn.pack(side="right", padx=10, pady=5)
             
-            select_btn = ctk.CTkButton(
-                pet_frame,
-                text="Generate",
-                width=100,
-                command=lambda p=pet: self._do_generate_pet_report(p, select_window)
-            )
-            select_btn.pack(side="right", padx=10, pady=5)
+            if key is not None:
+                more_btn = ctk.CTkButton(list_frame, text="Load more", width=120, fg_color="gray")
+                more_btn.configure(command=lambda: load_more(more_btn, key))
+                more_btn.pack(pady=5)
+        
+        def load_more(button, key):
+            # Replace the button with the next page of pets
+            try:
+                page, next_page_key, _ = self.db.read_pets_page(after_key=key, limit=self.PAGE_SIZE)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error loading pets: {str(e)}")
+                return
+            button.destroy()
+            add_pets(page, next_page_key)
+        
+        add_pets(pets, next_key)
         
         # Cancel button
         cancel_btn = ctk.CTkButton(
@@ -200,8 +225,11 @@ class ReportsWindow(ctk.CTkToplevel):
     def _do_generate_pet_report(self, pet, window):
         # Generate report for selected pet
         try:
-            vaccinations = self.db.read_vaccinations_by_pet(pet.pet_id)
-            filepath = self.report_gen.generate_pet_report(pet, vaccinations, self.db)
+            # Read from one point-in-time snapshot so check-ins can keep writing
+            with self.db.snapshot():
+                vaccinations = self.db.read_vaccinations_with_vaccine(
+                    pet.pet_id, include_archive=self.db.has_archive())
+                filepath = self.report_gen.generate_pet_report(pet, vaccinations, self.db)
             
             window.destroy()
             
@@ -223,13 +251,14 @@ class ReportsWindow(ctk.CTkToplevel):
     def _generate_all_pets_report(self):
         # Generate report of all pets
         try:
-            pets = self.db.read_all_pets()
+            with self.db.snapshot():
+                pets = self.db.read_pets_with_owners()
             
             if not pets:
                 messagebox.showwarning("No Pets", "No pets found in the system")
                 return
             
-            filepath = self.report_gen.generate_all_pets_report(pets, self.db)
+            filepath = self.report_gen.generate_all_pets_report(pets)
             
             messagebox.showinfo(
                 "Report Generated",
@@ -250,7 +279,9 @@ class ReportsWindow(ctk.CTkToplevel):
     def _generate_vaccination_schedule(self):
         # Generate vaccination schedule report
         try:
-            upcoming = self.db.get_upcoming_vaccinations(30)
+            with self.db.snapshot():
+                # Only each pet's latest dose: a booster given since replaces the old due date
+                upcoming = self.db.get_vaccination_statuses(30, ("due_soon",))
             
             if not upcoming:
                 messagebox.showinfo(
@@ -4,12 +4,14 @@ import customtkinter as ctk
 from tkinter import messagebox
 from tkcalendar import DateEntry
 from models import Pet, Owner
-from database import DatabaseManager
+from database import DatabaseManager, ConcurrencyError
 from datetime import datetime
 import re
 
 class UpdatePetWindow(ctk.CTkToplevel):
     # Update Pet Window class
+    PAGE_SIZE = 50
+    
     def __init__(self, parent, db: DatabaseManager, callback=None):
         # Initialize Update Pet window
         super().__init__(parent)
@@ -102,14 +104,17 @@ class UpdatePetWindow(ctk.CTkToplevel):
         self.form_frame.pack_forget()  # Hide initially
     
     def _load_pets(self, pets=None):
-        # Load pets into list
+        # Load (pet, owner) pairs into list
+        # Without search results only the first page is loaded; "Load more" fetches the rest
         # Clear existing
         for widget in self.pet_list_frame.winfo_children():
             widget.destroy()
+        self.load_more_btn = None
+        self.next_page_key = None
         
         try:
             if pets is None:
-                pets = self.db.read_all_pets()
+                pets, self.next_page_key, _ = self.db.read_pets_page(limit=self.PAGE_SIZE)
             
             if not pets:
                 no_pets = ctk.CTkLabel(
@@ -120,31 +125,62 @@ class UpdatePetWindow(ctk.CTkToplevel):
                 no_pets.pack(pady=20)
                 return
             
-            for pet in pets:
-                pet_frame = ctk.CTkFrame(self.pet_list_frame)
-                pet_frame.pack(fill="x", padx=5, pady=3)
-                
-                owner = self.db.read_owner(pet.owner_id)
-                owner_name = owner.name if owner else "Unknown"
-                info = f"ID: {pet.pet_id} | {pet.name} ({pet.species}) - Owner: {owner_name}"
-                pet_label = ctk.CTkLabel(
-                    pet_frame,
-                    text=info,
-                    anchor="w"
-                )
-                pet_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
-                
-                select_btn = ctk.CTkButton(
-                    pet_frame,
-                    text="Select",
-                    width=80,
-                    command=lambda p=pet: self._select_pet(p)
-                )
-                select_btn.pack(side="right", padx=10, pady=5)
+            for pet, owner in pets:
+                self._add_pet_row(pet, owner)
+            self._show_load_more()
         
         except Exception as e:
             messagebox.showerror("Error", f"Error loading pets: {str(e)}")
     
+    def _load_more_pets(self):
+        # Append the next page of pets to the list
+        try:
+            pets, self.next_page_key, _ = self.db.read_pets_page(
+                after_key=self.next_page_key, limit=self.PAGE_SIZE
+            )
+            self.load_more_btn.destroy()
+            self.load_more_btn = None
+            for pet, owner in pets:
+                self._add_pet_row(pet, owner)
+            self._show_load_more()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading pets: {str(e)}")
+    
+    def _show_load_more(self):
+        # Show the "Load more" button while another page exists
+        if self.next_page_key is None:
+            return
+        self.load_more_btn = ctk.CTkButton(
+            self.pet_list_frame,
+            text="Load more",
+            width=120,
+            fg_color="gray",
+            command=self._load_more_pets
+        )
+        self.load_more_btn.pack(pady=5)
+    
+    def _add_pet_row(self, pet: Pet, owner: Owner):
+        # Add one pet row to the list
+        pet_frame = ctk.CTkFrame(self.pet_list_frame)
+        pet_frame.pack(fill="x", padx=5, pady=3)
+        
+        owner_name = owner.name if owner else "Unknown"
+        info = f"ID: {pet.pet_id} | {pet.name} ({pet.species}) - Owner: {owner_name}"
+        pet_label = ctk.CTkLabel(
+            pet_frame,
+            text=info,
+            anchor="w"
+        )
+        pet_label.pack(side="left", padx=10, pady=8, fill="x", expand=True)
+        
+        select_btn = ctk.CTkButton(
+            pet_frame,
+            text="Select",
+            width=80,
+            command=lambda p=pet: self._select_pet(p)
+        )
+        select_btn.pack(side="right", padx=10, pady=5)
+    
     def _search_pets(self):
         # Search for pets
         search_term = self.search_entry.get().strip()
@@ -154,7 +190,7 @@ class UpdatePetWindow(ctk.CTkToplevel):
             return
         
         try:
-            pets = self.db.search_pets(search_term)
+            pets = self.db.search_pets_with_owners(search_term)
             self._load_pets(pets)
         except Exception as e:
             messagebox.showerror("Error", f"Error searching pets: {str(e)}")
@@ -264,6 +300,7 @@ class UpdatePetWindow(ctk.CTkToplevel):
         self.owner_name_entry.insert(0, owner.name if owner else "")
         self.owner_name_entry.grid(row=row, column=1, pady=5, padx=5, sticky="w")
         self.owner_id = pet.owner_id
+        self.owner_version = owner.row_version if owner else None
         
         row += 1
         ctk.CTkLabel(self.form_frame, text="Owner Phone: *").grid(row=row, column=0, sticky="w", pady=5, padx=5)
@@ -360,9 +397,9 @@ class UpdatePetWindow(ctk.CTkToplevel):
                 name=owner_name,
                 phone=owner_phone,
                 email=owner_email,
-                address=owner_address
+                address=owner_address,
+                row_version=self.owner_version
             )
-            self.db.update_owner(owner)
             
             # Update pet object
             self.current_pet.name = self.name_entry.get().strip()
@@ -381,8 +418,10 @@ class UpdatePetWindow(ctk.CTkToplevel):
                 messagebox.showerror("Error", "Pet name is required")
                 return
             
-            # Update in database
-            success = self.db.update_pet(self.current_pet)
+            # Update owner and pet in one transaction
+            with self.db.transaction():
+                self.db.update_owner(owner)
+                success = self.db.update_pet(self.current_pet)
             
             if success:
                 messagebox.showinfo("Success", f"Pet '{self.current_pet.name}' updated successfully!")
@@ -396,9 +435,33 @@ class UpdatePetWindow(ctk.CTkToplevel):
             else:
                 messagebox.showerror("Error", "Failed to update pet")
         
+        except ConcurrencyError:
+            # Another terminal saved this pet or owner after the form was opened
+            messagebox.showwarning(
+                "Changed Elsewhere",
+                "This pet or its owner was changed in another window since you opened it.\n"
+                "The form has been reloaded with the latest values; please apply your changes again."
+            )
+            self._reload_current_pet()
         except Exception as e:
             messagebox.showerror("Error", f"Error updating pet: {str(e)}")
     
+    def _reload_current_pet(self):
+        # Read the selected pet again and rebuild the form from the stored values
+        try:
+            pet = self.db.read_pet(self.current_pet.pet_id)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading pet: {str(e)}")
+            return
+        if pet is None:
+            messagebox.showerror("Error", "This pet no longer exists")
+            self.current_pet = None
+            self.form_frame.pack_forget()
+            self._load_pets()
+            return
+        self.current_pet = pet
+        self._show_update_form()
+    
     def _delete_pet(self):
         # Delete pet from database
         if not self.current_pet:
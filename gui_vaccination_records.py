@@ -7,7 +7,7 @@ import customtkinter as ctk
 from tkinter import messagebox
 from tkcalendar import DateEntry
 from models import Pet, Vaccination, VaccineType
-from database import DatabaseManager
+from database import DatabaseManager, DEFAULT_DUE_INTERVAL_DAYS
 from datetime import datetime, timedelta
 from prettytable import PrettyTable
 
@@ -157,7 +157,8 @@ class VaccinationRecordsWindow(ctk.CTkToplevel):
             widget.destroy()
         
         try:
-            vaccinations = self.db.read_vaccinations_by_pet(self.selected_pet.pet_id)
+            vaccinations = self.db.read_vaccinations_with_vaccine(
+                self.selected_pet.pet_id, include_archive=self.db.has_archive())
             
             if not vaccinations:
                 no_vacc = ctk.CTkLabel(
@@ -169,13 +170,13 @@ class VaccinationRecordsWindow(ctk.CTkToplevel):
                 return
             
             # Display vaccinations
-            for vacc in vaccinations:
-                self._create_vaccination_card(vacc)
+            for vacc, vaccine in vaccinations:
+                self._create_vaccination_card(vacc, vaccine)
         
         except Exception as e:
             messagebox.showerror("Error", f"Error loading vaccinations: {str(e)}")
     
-    def _create_vaccination_card(self, vacc: Vaccination):
+    def _create_vaccination_card(self, vacc: Vaccination, vaccine: VaccineType):
         # Create a card for displaying vaccination information
         card = ctk.CTkFrame(self.vacc_list_frame)
         card.pack(fill="x", padx=5, pady=5)
@@ -185,7 +186,6 @@ class VaccinationRecordsWindow(ctk.CTkToplevel):
         info_frame.pack(side="left", fill="both", expand=True, padx=10, pady=10)
         
         # Vaccine name
-        vaccine = self.db.read_vaccine_type(vacc.vaccine_id)
         vaccine_name = vaccine.vaccine_name if vaccine else "Unknown"
         name_label = ctk.CTkLabel(
             info_frame,
@@ -231,7 +231,7 @@ class VaccinationRecordsWindow(ctk.CTkToplevel):
             text="View Details",
             width=100,
             height=28,
-            command=lambda v=vacc: self._view_vaccination_details(v)
+            command=lambda v=vacc, vt=vaccine: self._view_vaccination_details(v, vt)
         )
         view_btn.pack(side="left", padx=3)
         
@@ -242,13 +242,12 @@ class VaccinationRecordsWindow(ctk.CTkToplevel):
             height=28,
             fg_color="red",
             hover_color="darkred",
-            command=lambda v=vacc: self._delete_vaccination(v)
+            command=lambda v=vacc, vt=vaccine: self._delete_vaccination(v, vt)
         )
         delete_btn.pack(side="left", padx=3)
     
-    def _view_vaccination_details(self, vacc: Vaccination):
+    def _view_vaccination_details(self, vacc: Vaccination, vaccine: VaccineType):
         # Show detailed vaccination information
-        vaccine = self.db.read_vaccine_type(vacc.vaccine_id)
         vaccine_name = vaccine.vaccine_name if vaccine else "Unknown"
         manufacturer = vaccine.manufacturer if vaccine else "N/A"
         
@@ -272,9 +271,8 @@ Notes: {vacc.notes or 'No additional notes'}
         
         messagebox.showinfo("Vaccination Details", details.strip())
     
-    def _delete_vaccination(self, vacc: Vaccination):
+    def _delete_vaccination(self, vacc: Vaccination, vaccine: VaccineType):
         # Delete vaccination record
-        vaccine = self.db.read_vaccine_type(vacc.vaccine_id)
         vaccine_name = vaccine.vaccine_name if vaccine else "Unknown"
         confirm = messagebox.askyesno(
             "Confirm Deletion",
@@ -368,8 +366,6 @@ Notes: {vacc.notes or 'No additional notes'}
             borderwidth=2,
             date_pattern='yyyy-mm-dd'
         )
-        # Set default to 1 year from vaccination date
-        next_due_entry.set_date(datetime.now() + timedelta(days=365))
         next_due_entry.grid(row=row, column=1, pady=5, padx=5, sticky="w")
         
         row += 1
@@ -412,6 +408,30 @@ Notes: {vacc.notes or 'No additional notes'}
         )
         required_label.grid(row=row, column=0, columnspan=2, pady=(10, 5))
         
+        # Suggest the next due date from the vaccination protocol for this species,
+        # vaccine and dose (a year when no protocol covers it); refreshed whenever
+        # one of those or the vaccination date changes
+        def suggest_next_due_date(*_):
+            try:
+                dose_num = int(dose_entry.get().strip() or "1")
+            except ValueError:
+                return
+            try:
+                due = self.db.compute_next_due_date(
+                    self.selected_pet.species,
+                    self.vaccine_map.get(vaccine_var.get().strip()),
+                    max(dose_num, 1),
+                    vacc_date_entry.get_date().strftime("%Y-%m-%d")
+                )
+                next_due_entry.set_date(datetime.strptime(due, "%Y-%m-%d"))
+            except Exception:
+                next_due_entry.set_date(vacc_date_entry.get_date() + timedelta(days=DEFAULT_DUE_INTERVAL_DAYS))
+        
+        vaccine_combo.configure(command=suggest_next_due_date)
+        vacc_date_entry.bind("<<DateEntrySelected>>", suggest_next_due_date)
+        dose_entry.bind("<FocusOut>", suggest_next_due_date)
+        suggest_next_due_date()
+        
         # Save function
         def save_vaccination():
             vaccine_name = vaccine_var.get().strip()
@@ -450,15 +470,16 @@ Notes: {vacc.notes or 'No additional notes'}
                     notes=notes_entry.get("1.0", "end-1c").strip()
                 )
                 
-                vacc_id = self.db.create_vaccination(vacc)
-                
-                messagebox.showinfo("Success", f"Vaccination record added successfully!\nID: {vacc_id}")
+                if self.db.write_behind_enabled():
+                    # Queued for the writer thread; the result is picked up without blocking
+                    future = self.db.submit_vaccination(vacc)
+                    add_window.destroy()
+                    self._wait_for_saved_vaccination(future)
+                    return
                 
+                vacc_id = self.db.create_vaccination(vacc)
                 add_window.destroy()
-                self._load_vaccinations()
-                
-                if self.callback:
-                    self.callback()
+                self._on_vaccination_saved(vacc_id)
             
             except Exception as e:
                 messagebox.showerror("Error", f"Error saving vaccination: {str(e)}")
@@ -487,3 +508,21 @@ Notes: {vacc.notes or 'No additional notes'}
             fg_color="gray"
         )
         cancel_btn.grid(row=0, column=1, padx=5)
+    
+    def _wait_for_saved_vaccination(self, future):
+        # Poll a write-behind save from the Tk event loop until its batch commits
+        if not future.done():
+            self.after(50, lambda: self._wait_for_saved_vaccination(future))
+            return
+        try:
+            self._on_vaccination_saved(future.result())
+        except Exception as e:
+            messagebox.showerror("Error", f"Error saving vaccination: {str(e)}")
+    
+    def _on_vaccination_saved(self, vacc_id: int):
+        # Confirm a saved vaccination and refresh this window and the dashboard
+        messagebox.showinfo("Success", f"Vaccination record added successfully!\nID: {vacc_id}")
+        self._load_vaccinations()
+        
+        if self.callback:
+            self.callback()
@@ -0,0 +1,424 @@
+# Bulk importer for Pet Clinic Vaccination Record System
+# Streams owners, pets or vaccinations from a CSV or JSONL file, validates rows in a
+# pool of worker processes and writes them in large batched transactions.
+# Rows that fail validation or a constraint go to a JSONL reject file.
+#
+#   python importer.py owners.csv --kind owners
+#   python importer.py pets.jsonl --kind pets [--db pet_clinic.db] [--batch-size 5000]
+#   python importer.py vaccinations.csv --kind vaccinations [--workers 4] [--rejects rejects.jsonl]
+#
+# Columns (CSV header or JSON keys):
+#   owners:       name, phone, email, address
+#   pets:         name, species, breed, date_of_birth, gender, color, microchip_number,
+#                 registration_date, notes, owner_name, owner_phone, owner_email, owner_address
+#   vaccinations: microchip_number, vaccine_name, vaccination_date, next_due_date,
+#                 veterinarian_name, batch_number, dose_number, site_administered,
+#                 adverse_reactions, notes
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cache import LRUCache
+from database import PRAGMA_PROFILES, DatabaseManager
+from migrations import owner_name_key, owner_phone_key
+from models import Owner, Pet, Vaccination, validate_date, validate_email, validate_phone
+
+logger = logging.getLogger(__name__)
+
+OWNER_FIELDS = ('name', 'phone', 'email', 'address')
+PET_FIELDS = ('name', 'species', 'breed', 'date_of_birth', 'gender', 'color',
+            'microchip_number', 'registration_date', 'notes')
+VACCINATION_FIELDS = ('microchip_number', 'vaccine_name', 'vaccination_date', 'next_due_date',
+                    'veterinarian_name', 'batch_number', 'dose_number', 'site_administered',
+                    'adverse_reactions', 'notes')
+
+# (line number, row as read from the file)
+SourceRow = Tuple[int, dict]
+# (line number, cleaned row - or the source row when invalid -, error message or None)
+CheckedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+# VALIDATION (runs in worker processes, so everything here is module level)
+
+def _text(row: dict, field: str) -> str:
+    # Field as a stripped string; missing and null values become ""
+    value = row.get(field)
+    return "" if value is None else str(value).strip()
+
+
+def _check_owner(row: dict, prefix: str = "") -> dict:
+    # Owner fields through the Owner setters and the form's phone/email rules
+    owner = Owner()
+    owner.name = _text(row, prefix + 'name')
+    owner.phone = _text(row, prefix + 'phone')
+    owner.email = _text(row, prefix + 'email')
+    owner.address = _text(row, prefix + 'address')
+    if not validate_phone(owner.phone):
+        raise ValueError("Invalid phone number")
+    if not validate_email(owner.email):
+        raise ValueError("Invalid email address")
+    return {field: getattr(owner, field) for field in OWNER_FIELDS}
+
+
+def _check_pet(row: dict) -> dict:
+    # Pet fields through the Pet setters plus date checks; the owner is nested
+    pet = Pet()
+    pet.name = _text(row, 'name')
+    pet.species = _text(row, 'species')
+    pet.breed = _text(row, 'breed')
+    pet.date_of_birth = _text(row, 'date_of_birth')
+    pet.gender = _text(row, 'gender')
+    pet.color = _text(row, 'color')
+    pet.microchip_number = _text(row, 'microchip_number')
+    pet.registration_date = _text(row, 'registration_date')
+    pet.notes = _text(row, 'notes')
+    for field in ('date_of_birth', 'registration_date'):
+        if not validate_date(getattr(pet, field)):
+            raise ValueError(f"Invalid {field.replace('_', ' ')}, use YYYY-MM-DD")
+    cleaned = {field: getattr(pet, field) for field in PET_FIELDS}
+    cleaned['owner'] = _check_owner(row, prefix='owner_')
+    return cleaned
+
+
+def _check_vaccination(row: dict) -> dict:
+    # Vaccination fields; pet and vaccine stay natural keys until the write phase
+    microchip_number = _text(row, 'microchip_number')
+    if not microchip_number:
+        raise ValueError("Microchip number is required to find the pet")
+    vaccine_name = _text(row, 'vaccine_name')
+    if not vaccine_name:
+        raise ValueError("Vaccine name cannot be empty")
+    dose = _text(row, 'dose_number') or "1"
+    try:
+        dose_number = int(dose)
+    except ValueError:
+        raise ValueError(f"Invalid dose number: {dose}")
+
+    # Placeholder ids; the setters still check dates and dose number
+    vaccination = Vaccination(pet_id=1, vaccine_id=1)
+    vaccination.vaccination_date = _text(row, 'vaccination_date')
+    vaccination.next_due_date = _text(row, 'next_due_date')
+    vaccination.veterinarian_name = _text(row, 'veterinarian_name')
+    vaccination.batch_number = _text(row, 'batch_number')
+    vaccination.dose_number = dose_number
+    vaccination.site_administered = _text(row, 'site_administered')
+    vaccination.adverse_reactions = _text(row, 'adverse_reactions')
+    vaccination.notes = _text(row, 'notes')
+    for field in ('vaccination_date', 'next_due_date'):
+        if not validate_date(getattr(vaccination, field)):
+            raise ValueError(f"Invalid {field.replace('_', ' ')}, use YYYY-MM-DD")
+    cleaned = {field: getattr(vaccination, field) for field in VACCINATION_FIELDS[2:]}
+    cleaned['microchip_number'] = microchip_number
+    cleaned['vaccine_name'] = vaccine_name
+    return cleaned
+
+
+CHECKS = {
+    'owners': _check_owner,
+    'pets': _check_pet,
+    'vaccinations': _check_vaccination,
+}
+
+
+def validate_chunk(kind: str, rows: List[SourceRow]) -> List[CheckedRow]:
+    # Validate one chunk of rows; errors are returned, never raised
+    check = CHECKS[kind]
+    results = []
+    for line, row in rows:
+        if '_error' in row:
+            results.append((line, {'text': row['_text']}, row['_error']))
+            continue
+        try:
+            results.append((line, check(row), None))
+        except (ValueError, TypeError, AttributeError) as e:
+            results.append((line, row, str(e)))
+    return results
+
+
+# READING
+
+def read_rows(path: str) -> Iterator[SourceRow]:
+    # Stream (line, row) pairs from a .csv file or a JSON Lines file
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        return
+
+    with open(path, encoding='utf-8') as f:
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                row = {'_error': f"Invalid JSON: {e}", '_text': text.rstrip('\n')}
+            if not isinstance(row, dict):
+                row = {'_error': "Expected a JSON object", '_text': text.rstrip('\n')}
+            yield line, row
+
+
+class Importer:
+    # Validates rows in parallel and writes them to one DatabaseManager
+    def __init__(self, db: DatabaseManager, kind: str, batch_size: int = 5000,
+                workers: Optional[int] = None, rejects_path: Optional[str] = None,
+                cache_size: int = 100000):
+        # batch_size rows are validated together and written in one transaction
+        # workers=0 validates in this process (useful for small files and debugging)
+        if kind not in CHECKS:
+            raise ValueError(f"Unknown import kind: {kind}")
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.db = db
+        self.kind = kind
+        self.batch_size = batch_size
+        # One core is left to this process, which reads the file and writes the batches
+        self.workers = max((os.cpu_count() or 1) - 1, 0) if workers is None else workers
+        self.rejects_path = rejects_path
+        self.counts = {'read': 0, 'imported': 0, 'existing': 0, 'rejected': 0}
+        self._rejects = None
+        # (name_key, phone_key) -> owner_id, microchip -> pet_id; misses fall back to indexed lookups
+        self._owner_ids = LRUCache(cache_size)
+        self._pet_ids = LRUCache(cache_size)
+        self._vaccine_ids = {}
+
+    def run(self, rows: Iterable[SourceRow]) -> dict:
+        # Import every row and return the counters
+        start = perf_counter()
+        if self.kind == 'vaccinations':
+            self._vaccine_ids = {v.vaccine_name.lower(): v.vaccine_id
+                                for v in self.db.read_all_vaccine_types()}
+        try:
+            for checked in self._validated_chunks(iter(rows)):
+                self._write_chunk(checked)
+                logger.info("%(read)d rows read, %(imported)d imported, "
+                            "%(existing)d existing, %(rejected)d rejected", self.counts)
+        finally:
+            if self._rejects is not None:
+                self._rejects.close()
+                self._rejects = None
+        self.counts['seconds'] = round(perf_counter() - start, 3)
+        return dict(self.counts)
+
+    def _validated_chunks(self, rows: Iterator[SourceRow]) -> Iterator[List[CheckedRow]]:
+        # Validated chunks in file order; at most 2 chunks per worker are in flight
+        # so memory stays bounded however large the file is
+        def next_chunk():
+            chunk = list(islice(rows, self.batch_size))
+            self.counts['read'] += len(chunk)
+            return chunk
+
+        if self.workers == 0:
+            while True:
+                chunk = next_chunk()
+                if not chunk:
+                    return
+                yield validate_chunk(self.kind, chunk)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < self.workers * 2:
+                    chunk = next_chunk()
+                    if not chunk:
+                        exhausted = True
+                        break
+                    in_flight.append(executor.submit(validate_chunk, self.kind, chunk))
+                if not in_flight:
+                    return
+                yield in_flight.popleft().result()
+
+    def _write_chunk(self, checked: List[CheckedRow]):
+        # Write the valid rows of one chunk; each bulk create is one transaction
+        # (not nested in an outer one: inside a SAVEPOINT every trigger-fed insert
+        # needs a statement journal, which costs several times the insert itself)
+        valid = []
+        for line, row, error in checked:
+            if error is None:
+                valid.append((line, row))
+            else:
+                self._reject(line, error, row)
+        if not valid:
+            return
+        if self.kind == 'owners':
+            self._write_owners(valid)
+        elif self.kind == 'pets':
+            self._write_pets(valid)
+        else:
+            self._write_vaccinations(valid)
+
+    @staticmethod
+    def _owner_key(owner: dict) -> tuple:
+        # (name_key, phone_key) of an owner row, as find_owner and dedup match it
+        return owner_name_key(owner['name']), owner_phone_key(owner['phone'])
+
+    def _resolve_owners(self, owners: List[dict]) -> Tuple[Dict[tuple, Optional[int]], set]:
+        # Owner id for every normalized (name, phone), creating the owners that do not exist yet
+        # Returns (ids by _owner_key, keys created here); a failed create maps to None
+        resolved = {}
+        missing = {}
+        for owner in owners:
+            key = self._owner_key(owner)
+            if key in resolved or key in missing:
+                continue
+            owner_id = self._owner_ids.get(key)
+            if owner_id is None:
+                existing = self.db.find_owner(owner['name'], owner['phone'])
+                owner_id = existing.owner_id if existing else None
+            if owner_id is None:
+                missing[key] = owner
+            else:
+                resolved[key] = owner_id
+                self._owner_ids.put(key, owner_id)
+
+        if missing:
+            ids, errors = self.db.create_owners_bulk(
+                Owner(None, o['name'], o['phone'], o['email'], o['address'])
+                for o in missing.values())
+            for key, owner_id in zip(missing, ids):
+                resolved[key] = owner_id
+                if owner_id is not None:
+                    self._owner_ids.put(key, owner_id)
+        return resolved, set(missing)
+
+    def _write_owners(self, valid: List[Tuple[int, dict]]):
+        # Insert owners that are not on file yet; known (name, phone) pairs are skipped
+        resolved, created = self._resolve_owners([row for _, row in valid])
+        for line, row in valid:
+            key = self._owner_key(row)
+            if resolved.get(key) is None:
+                self._reject(line, "Owner could not be created", row)
+            elif key in created:
+                # Later duplicates of a row created in this chunk count as existing
+                created.discard(key)
+                self.counts['imported'] += 1
+            else:
+                self.counts['existing'] += 1
+
+    def _write_pets(self, valid: List[Tuple[int, dict]]):
+        # Resolve (or create) each pet's owner, then insert the pets
+        # Pets whose microchip number is already on file are skipped, so an
+        # interrupted import can simply be run again
+        new = []
+        for line, row in valid:
+            if row['microchip_number'] and self._pet_id(row['microchip_number']) is not None:
+                self.counts['existing'] += 1
+            else:
+                new.append((line, row))
+        valid = new
+        if not valid:
+            return
+        resolved, _ = self._resolve_owners([row['owner'] for _, row in valid])
+        pending = []
+        for line, row in valid:
+            owner_id = resolved.get(self._owner_key(row['owner']))
+            if owner_id is None:
+                self._reject(line, "Owner could not be created", row)
+            else:
+                pending.append((line, row, owner_id))
+
+        ids, errors = self.db.create_pets_bulk(
+            Pet(None, row['name'], row['species'], row['breed'], row['date_of_birth'],
+                row['gender'], row['color'], owner_id, row['microchip_number'],
+                row['registration_date'], row['notes'])
+            for _, row, owner_id in pending)
+        self._record_bulk_result(pending, ids, errors)
+        for (_, row, _), pet_id in zip(pending, ids):
+            if pet_id is not None and row['microchip_number']:
+                self._pet_ids.put(row['microchip_number'], pet_id)
+
+    def _write_vaccinations(self, valid: List[Tuple[int, dict]]):
+        # Resolve pets by microchip and vaccines by name, then insert the vaccinations
+        pending = []
+        for line, row in valid:
+            vaccine_id = self._vaccine_ids.get(row['vaccine_name'].lower())
+            if vaccine_id is None:
+                self._reject(line, f"Unknown vaccine: {row['vaccine_name']}", row)
+                continue
+            pet_id = self._pet_id(row['microchip_number'])
+            if pet_id is None:
+                self._reject(line, f"Unknown microchip number: {row['microchip_number']}", row)
+                continue
+            pending.append((line, row, (pet_id, vaccine_id)))
+
+        ids, errors = self.db.create_vaccinations_bulk(
+            Vaccination(None, pet_id, vaccine_id, row['vaccination_date'], row['next_due_date'],
+                        row['veterinarian_name'], row['batch_number'], row['dose_number'],
+                        row['site_administered'], row['adverse_reactions'], row['notes'])
+            for _, row, (pet_id, vaccine_id) in pending)
+        self._record_bulk_result(pending, ids, errors)
+
+    def _pet_id(self, microchip_number: str) -> Optional[int]:
+        # Pet id for a microchip number, through the cache and then the unique index
+        pet_id = self._pet_ids.get(microchip_number)
+        if pet_id is None:
+            pet = self.db.find_pet_by_microchip(microchip_number)
+            if pet is not None:
+                pet_id = pet.pet_id
+                self._pet_ids.put(microchip_number, pet_id)
+        return pet_id
+
+    def _record_bulk_result(self, pending: list, ids: List[Optional[int]],
+                            errors: List[Tuple[int, str]]):
+        # Count inserted rows and reject the ones a constraint refused
+        self.counts['imported'] += sum(1 for row_id in ids if row_id is not None)
+        for index, message in errors:
+            line, row, _ = pending[index]
+            self._reject(line, message, row)
+
+    def _reject(self, line: int, error: str, row: Optional[dict]):
+        # Append one rejected row to the reject file
+        self.counts['rejected'] += 1
+        if self.rejects_path is None:
+            return
+        if self._rejects is None:
+            self._rejects = open(self.rejects_path, 'w', encoding='utf-8')
+        self._rejects.write(json.dumps({'line': line, 'error': error, 'row': row}) + "\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import owners, pets or vaccinations from CSV or JSONL")
+    parser.add_argument('file', help=".csv file with a header row, or a JSON Lines file")
+    parser.add_argument('--kind', required=True, choices=sorted(CHECKS), help="what the file holds")
+    parser.add_argument('--db', default="pet_clinic.db", help="database file to import into")
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help="rows validated together and written per transaction")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="validation processes (default: CPU count - 1, 0 validates in-process)")
+    parser.add_argument('--rejects', default=None,
+                        help="JSONL file for rejected rows (default: <file>.rejects.jsonl)")
+    parser.add_argument('--profile', default="balanced", choices=sorted(PRAGMA_PROFILES),
+                        help="PRAGMA profile used while importing")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    rejects = args.rejects or os.path.splitext(args.file)[0] + ".rejects.jsonl"
+    db = DatabaseManager(args.db, profile=args.profile)
+    try:
+        importer = Importer(db, args.kind, args.batch_size, args.workers, rejects)
+        counts = importer.run(read_rows(args.file))
+        print(f"Read {counts['read']} row(s) in {counts['seconds']}s: {counts['imported']} imported, "
+            f"{counts['existing']} already on file, {counts['rejected']} rejected")
+        if counts['rejected']:
+            print(f"Rejected rows written to {rejects}")
+        return 0
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+# Query timing instrumentation for Pet Clinic Vaccination Record System
+# Opt-in: nothing here runs until DatabaseManager.enable_instrumentation() is called
+
+import sqlite3
+import json
+import logging
+import threading
+import types
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from time import perf_counter
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    # Call count, rows and bucketed latency for one method or SQL statement
+    def __init__(self):
+        self.count = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int = 0):
+        # Record one call
+        self.count += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.min_ms = elapsed_ms if self.min_ms is None else min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        # Upper bound of the bucket holding the given fraction of calls
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= threshold:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(float(LATENCY_BUCKETS_MS[index]), self.max_ms)
+                break
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        # JSON-friendly summary
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': round(self.percentile(0.50), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'buckets': {label: n for label, n in zip(labels, self.buckets) if n}
+        }
+
+
+class QueryStats:
+    # Thread-safe registry of per-method and per-statement timings plus a slow-query log
+    def __init__(self, slow_query_ms: float = 100.0, slow_log_size: int = 100):
+        self.slow_query_ms = slow_query_ms
+        self._methods = {}
+        self._statements = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record_method(self, name: str, elapsed_ms: float, rows: int = 0):
+        # Record one DatabaseManager method call
+        with self._lock:
+            histogram = self._methods.get(name)
+            if histogram is None:
+                histogram = self._methods[name] = LatencyHistogram()
+            histogram.add(elapsed_ms, rows)
+
+    def record_statement(self, sql: str, elapsed_ms: float, rows: int = 0):
+        # Record one SQL statement (execute plus fetches), logging it if slow
+        with self._lock:
+            histogram = self._statements.get(sql)
+            if histogram is None:
+                histogram = self._statements[sql] = LatencyHistogram()
+            histogram.add(elapsed_ms, rows)
+            slow = elapsed_ms >= self.slow_query_ms
+            if slow:
+                self._slow_queries.append({
+                    'sql': sql,
+                    'elapsed_ms': round(elapsed_ms, 3),
+                    'rows': rows,
+                    'at': datetime.now().isoformat(timespec='seconds')
+                })
+        if slow:
+            logger.warning("Slow query (%.1f ms, %d rows): %s", elapsed_ms, rows, sql)
+
+    def track(self, cursor):
+        # Remember a cursor with a statement still being fetched on this thread
+        pending = getattr(self._local, 'cursors', None)
+        if pending is None:
+            pending = self._local.cursors = set()
+        pending.add(cursor)
+
+    def flush(self):
+        # Record statements this thread has not finished fetching (e.g. a single fetchone)
+        pending = getattr(self._local, 'cursors', None)
+        while pending:
+            pending.pop()._finish()
+
+    def slow_queries(self) -> List[dict]:
+        # Most recent slow statements, oldest first
+        with self._lock:
+            return list(self._slow_queries)
+
+    def snapshot(self) -> dict:
+        # Aggregated stats as plain dicts, slowest total time first
+        self.flush()
+        with self._lock:
+            def ordered(table):
+                return {key: histogram.to_dict() for key, histogram in
+                        sorted(table.items(), key=lambda item: -item[1].total_ms)}
+            return {
+                'slow_query_ms': self.slow_query_ms,
+                'methods': ordered(self._methods),
+                'statements': ordered(self._statements),
+                'slow_queries': list(self._slow_queries)
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        # Snapshot serialised as JSON
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump_json(self, path: str):
+        # Write the snapshot to a JSON file
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+
+    def reset(self):
+        # Forget everything recorded so far
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self._slow_queries.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # Cursor that times each statement from execute through its last fetch
+    # Create with connection.cursor(InstrumentedCursor) and then set .stats
+    stats = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_sql = None
+        self._pending_ms = 0.0
+        self._pending_rows = 0
+
+    def _begin(self, sql: str):
+        # Close out the previous statement and start timing a new one
+        self._finish()
+        self._pending_sql = " ".join(sql.split())
+        self._pending_ms = 0.0
+        self._pending_rows = 0
+        if self.stats is not None:
+            self.stats.track(self)
+
+    def _finish(self):
+        # Record the pending statement, if any
+        sql = self._pending_sql
+        self._pending_sql = None
+        if sql is not None and self.stats is not None:
+            self.stats.record_statement(sql, self._pending_ms, self._pending_rows)
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql)
+        start = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending_ms += (perf_counter() - start) * 1000
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql)
+        start = perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending_ms += (perf_counter() - start) * 1000
+            self._pending_rows = max(self.rowcount, 0)
+            self._finish()
+
+    def fetchone(self):
+        start = perf_counter()
+        row = super().fetchone()
+        self._pending_ms += (perf_counter() - start) * 1000
+        if row is None:
+            self._finish()
+        else:
+            self._pending_rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        start = perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._pending_ms += (perf_counter() - start) * 1000
+        self._pending_rows += len(rows)
+        if len(rows) < (self.arraysize if size is None else size):
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = perf_counter()
+        rows = super().fetchall()
+        self._pending_ms += (perf_counter() - start) * 1000
+        self._pending_rows += len(rows)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+def _count_rows(result) -> int:
+    # Rows a method returned: list length, 1 for a single record, 0 for None
+    # A tuple leading with a list - read_pets_page's (page, next_key, total) or a bulk
+    # create's (ids, errors) - counts that list's rows, less the ids of rejected rows
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return sum(1 for row in result[0] if row is not None)
+    if result is None or isinstance(result, (bool, int, float, str, dict, tuple)):
+        return 0
+    return 1
+
+
+def instrument_method(name: str, method: Callable, stats: QueryStats) -> Callable:
+    # Wrap a bound method so each call is timed; generators are timed until exhausted
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except BaseException:
+            stats.flush()
+            stats.record_method(name, (perf_counter() - start) * 1000)
+            raise
+        if isinstance(result, types.GeneratorType):
+            return _instrument_generator(name, result, start, stats)
+        stats.flush()
+        stats.record_method(name, (perf_counter() - start) * 1000, _count_rows(result))
+        return result
+    return wrapper
+
+
+def _instrument_generator(name: str, generator, start: float, stats: QueryStats):
+    # Time a streaming read from the call until the caller stops iterating
+    rows = 0
+    try:
+        for item in generator:
+            rows += 1
+            yield item
+    finally:
+        stats.flush()
+        stats.record_method(name, (perf_counter() - start) * 1000, rows)
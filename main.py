@@ -7,6 +7,7 @@ from typing import Optional
 import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime
+import logging
 import os
 
 # Import GUI windows
@@ -22,7 +23,14 @@ class PetClinicApp(ctk.CTk):
         super().__init__()
         
         # Database and Report Generator
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(pool_size=4, cache_size=1024,
+                                archive_path="pet_clinic_archive.db")
+        # PET_CLINIC_QUERY_STATS=<path.json> times every query and dumps the stats on exit
+        self.query_stats_path = os.environ.get("PET_CLINIC_QUERY_STATS")
+        if self.query_stats_path:
+            self.db.enable_instrumentation(slow_query_ms=100.0)
+        # New vaccinations are committed in small batches by a writer thread
+        self.db.enable_write_behind(max_batch=50, max_delay_ms=100.0)
         self.report_gen = ReportGenerator()
         
         # Window configuration
@@ -365,15 +373,15 @@ class PetClinicApp(ctk.CTk):
     def _load_dashboard_data(self):
         # Load and display dashboard data
         try:
-            # Get statistics
-            pet_count = self.db.get_pet_count()
-            vacc_count = self.db.get_vaccination_count()
-            upcoming = self.db.get_upcoming_vaccinations(30)
+            self._dashboard_seq = self.db.latest_change_seq()
+            
+            # Get statistics (trigger-maintained counters)
+            stats = self.db.get_dashboard_stats(30)
             
             # Update stat cards
-            self.pets_card.value_label.configure(text=f"{self.pets_card.icon} {pet_count}")
-            self.vacc_card.value_label.configure(text=f"{self.vacc_card.icon} {vacc_count}")
-            self.upcoming_card.value_label.configure(text=f"{self.upcoming_card.icon} {len(upcoming)}")
+            self.pets_card.value_label.configure(text=f"{self.pets_card.icon} {stats['pet_count']}")
+            self.vacc_card.value_label.configure(text=f"{self.vacc_card.icon} {stats['vaccination_count']}")
+            self.upcoming_card.value_label.configure(text=f"{self.upcoming_card.icon} {stats['upcoming_count']}")
             
             # Load recent pets
             self._load_recent_pets()
@@ -381,13 +389,39 @@ class PetClinicApp(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Error", f"Error loading dashboard data: {str(e)}")
     
+    def _refresh_dashboard(self):
+        # Callback after a window saves: reload only what the change log says changed
+        try:
+            latest = self.db.latest_change_seq()
+            if latest == self._dashboard_seq:
+                return
+            # The recent pets list only shows pets and their owners
+            pets_changed = (self.db.changes_pruned_since(self._dashboard_seq) or
+                            bool(self.db.changes_since(self._dashboard_seq, limit=1,
+                                                    tables=("Pet", "Owner"))))
+            self._dashboard_seq = latest
+            self.db.sync_cache()
+            # The dashboard and the caches (just synced) have consumed the log up to here
+            self.db.prune_changes(self._dashboard_seq)
+            
+            stats = self.db.get_dashboard_stats(30)
+            self.pets_card.value_label.configure(text=f"{self.pets_card.icon} {stats['pet_count']}")
+            self.vacc_card.value_label.configure(text=f"{self.vacc_card.icon} {stats['vaccination_count']}")
+            self.upcoming_card.value_label.configure(text=f"{self.upcoming_card.icon} {stats['upcoming_count']}")
+            
+            if pets_changed:
+                self._load_recent_pets()
+        
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading dashboard data: {str(e)}")
+    
     def _load_recent_pets(self):
         # Load recent pets into dashboard
         for widget in self.recent_pets_frame.winfo_children():
             widget.destroy()
         
         try:
-            pets = self.db.read_all_pets()[:10]  # Get first 10 pets
+            pets, _, _ = self.db.read_pets_page(limit=10)  # Get first 10 pets
             
             if not pets:
                 no_pets_label = ctk.CTkLabel(
@@ -399,11 +433,10 @@ class PetClinicApp(ctk.CTk):
                 no_pets_label.pack(pady=20)
                 return
             
-            for pet in pets:
+            for pet, owner in pets:
                 pet_frame = ctk.CTkFrame(self.recent_pets_frame, fg_color=self.colors['light'], corner_radius=8)
                 pet_frame.pack(fill="x", padx=5, pady=5)
                 
-                owner = self.db.read_owner(pet.owner_id)
                 owner_name = owner.name if owner else "Unknown"
                 info_text = f"{pet.name} ({pet.species}) - Owner: {owner_name}"
                 pet_label = ctk.CTkLabel(
@@ -438,7 +471,8 @@ class PetClinicApp(ctk.CTk):
     def _view_pet_details(self, pet):
         # View pet details and generate report
         try:
-            vaccinations = self.db.read_vaccinations_by_pet(pet.pet_id)
+            vaccinations = self.db.read_vaccinations_with_vaccine(
+                pet.pet_id, include_archive=self.db.has_archive())
             filepath = self.report_gen.generate_pet_report(pet, vaccinations, self.db)
             
             messagebox.showinfo(
@@ -459,15 +493,15 @@ class PetClinicApp(ctk.CTk):
     
     def _open_add_pet(self):
         # Open Add Pet window
-        AddPetWindow(self, self.db, self._load_dashboard_data)
+        AddPetWindow(self, self.db, self._refresh_dashboard)
     
     def _open_update_pet(self):
         # Open Update Pet window
-        UpdatePetWindow(self, self.db, self._load_dashboard_data)
+        UpdatePetWindow(self, self.db, self._refresh_dashboard)
     
     def _open_vaccinations(self):
         # Open Vaccination Records window
-        VaccinationRecordsWindow(self, self.db, self._load_dashboard_data)
+        VaccinationRecordsWindow(self, self.db, self._refresh_dashboard)
     
     def _open_reports(self):
         # Open Reports window
@@ -485,10 +519,18 @@ class PetClinicApp(ctk.CTk):
     
     def on_closing(self):
         # Handle application closing
+        # Commit any queued vaccinations before the connections go away
+        try:
+            self.db.flush_writes(timeout=10.0)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error saving pending records: {str(e)}")
+        if self.query_stats_path:
+            self.db.dump_query_stats(self.query_stats_path)
         self.db.close()
         self.destroy()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
     app = PetClinicApp()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.run()
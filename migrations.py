@@ -0,0 +1,477 @@
+# Schema migrations for Pet Clinic Vaccination Record System
+# The schema version lives in PRAGMA user_version; each migration runs once,
+# in its own transaction, and bumps the version when it commits
+
+import sqlite3
+import logging
+import os
+import string
+from typing import Callable, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), 'database_schema.sql')
+
+# FTS5 index over pet name, species, breed, microchip and owner name
+# rowid is the pet_id; triggers keep it in sync with Pet and Owner
+PET_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS PetSearch USING fts5(
+    name, species, breed, microchip_number, owner_name,
+    tokenize = 'unicode61', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_pet_search_insert AFTER INSERT ON Pet BEGIN
+    INSERT INTO PetSearch (rowid, name, species, breed, microchip_number, owner_name)
+    VALUES (NEW.pet_id, NEW.name, NEW.species, NEW.breed, NEW.microchip_number,
+            (SELECT name FROM Owner WHERE owner_id = NEW.owner_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pet_search_update
+AFTER UPDATE OF name, species, breed, microchip_number, owner_id ON Pet BEGIN
+    DELETE FROM PetSearch WHERE rowid = OLD.pet_id;
+    INSERT INTO PetSearch (rowid, name, species, breed, microchip_number, owner_name)
+    VALUES (NEW.pet_id, NEW.name, NEW.species, NEW.breed, NEW.microchip_number,
+            (SELECT name FROM Owner WHERE owner_id = NEW.owner_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pet_search_delete AFTER DELETE ON Pet BEGIN
+    DELETE FROM PetSearch WHERE rowid = OLD.pet_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_owner_search_update AFTER UPDATE OF name ON Owner BEGIN
+    UPDATE PetSearch SET owner_name = NEW.name
+    WHERE rowid IN (SELECT pet_id FROM Pet WHERE owner_id = NEW.owner_id);
+END;
+"""
+
+# Set-based writers (DatabaseManager.recompute_due_dates) insert their table name into
+# BulkWrite inside their own transaction and delete it again before committing, so
+# other connections never see the row. While it is there the per-row next_due_date
+# triggers on Vaccination skip, and the writer does the same bookkeeping (ChangeLog,
+# DueDateStats, VaccinationStatus) in a few set-based statements instead
+BULK_WRITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS BulkWrite (table_name TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+# Trigger condition: no set-based writer is rewriting Vaccination in this transaction
+NOT_BULK_VACCINATION = "NOT EXISTS (SELECT 1 FROM BulkWrite WHERE table_name = 'Vaccination')"
+
+# Trigger-maintained dashboard counters
+# ClinicStats holds whole-table counts; DueDateStats counts the vaccinations of
+# active pets per next_due_date so "due within N days" sums at most N+1 rows
+CLINIC_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ClinicStats (
+    stat_name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS DueDateStats (
+    due_date DATE PRIMARY KEY,
+    vaccination_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_pet_insert AFTER INSERT ON Pet
+WHEN NEW.is_active = 1 BEGIN
+    UPDATE ClinicStats SET value = value + 1 WHERE stat_name = 'active_pets';
+END;
+
+-- BEFORE so the pet's vaccinations still exist; cascaded deletes then skip DueDateStats
+CREATE TRIGGER IF NOT EXISTS trg_stats_pet_delete BEFORE DELETE ON Pet
+WHEN OLD.is_active = 1 BEGIN
+    UPDATE ClinicStats SET value = value - 1 WHERE stat_name = 'active_pets';
+    UPDATE DueDateStats SET vaccination_count = vaccination_count - (
+        SELECT COUNT(*) FROM Vaccination v
+        WHERE v.pet_id = OLD.pet_id AND v.next_due_date = DueDateStats.due_date)
+    WHERE due_date IN (SELECT next_due_date FROM Vaccination WHERE pet_id = OLD.pet_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_pet_deactivate AFTER UPDATE OF is_active ON Pet
+WHEN OLD.is_active = 1 AND NEW.is_active IS NOT 1 BEGIN
+    UPDATE ClinicStats SET value = value - 1 WHERE stat_name = 'active_pets';
+    UPDATE DueDateStats SET vaccination_count = vaccination_count - (
+        SELECT COUNT(*) FROM Vaccination v
+        WHERE v.pet_id = NEW.pet_id AND v.next_due_date = DueDateStats.due_date)
+    WHERE due_date IN (SELECT next_due_date FROM Vaccination WHERE pet_id = NEW.pet_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_pet_activate AFTER UPDATE OF is_active ON Pet
+WHEN OLD.is_active IS NOT 1 AND NEW.is_active = 1 BEGIN
+    UPDATE ClinicStats SET value = value + 1 WHERE stat_name = 'active_pets';
+    INSERT INTO DueDateStats (due_date, vaccination_count)
+    SELECT next_due_date, COUNT(*) FROM Vaccination
+    WHERE pet_id = NEW.pet_id AND next_due_date IS NOT NULL
+    GROUP BY next_due_date
+    ON CONFLICT(due_date) DO UPDATE SET vaccination_count = vaccination_count + excluded.vaccination_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_vaccination_insert AFTER INSERT ON Vaccination BEGIN
+    UPDATE ClinicStats SET value = value + 1 WHERE stat_name = 'vaccinations';
+    INSERT INTO DueDateStats (due_date, vaccination_count)
+    SELECT NEW.next_due_date, 1
+    WHERE NEW.next_due_date IS NOT NULL
+    AND (SELECT is_active FROM Pet WHERE pet_id = NEW.pet_id) = 1
+    ON CONFLICT(due_date) DO UPDATE SET vaccination_count = vaccination_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_vaccination_delete AFTER DELETE ON Vaccination BEGIN
+    UPDATE ClinicStats SET value = value - 1 WHERE stat_name = 'vaccinations';
+    UPDATE DueDateStats SET vaccination_count = vaccination_count - 1
+    WHERE due_date = OLD.next_due_date
+    AND (SELECT is_active FROM Pet WHERE pet_id = OLD.pet_id) = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_vaccination_update
+AFTER UPDATE OF next_due_date, pet_id ON Vaccination
+WHEN """ + NOT_BULK_VACCINATION + """ BEGIN
+    UPDATE DueDateStats SET vaccination_count = vaccination_count - 1
+    WHERE due_date = OLD.next_due_date
+    AND (SELECT is_active FROM Pet WHERE pet_id = OLD.pet_id) = 1;
+    INSERT INTO DueDateStats (due_date, vaccination_count)
+    SELECT NEW.next_due_date, 1
+    WHERE NEW.next_due_date IS NOT NULL
+    AND (SELECT is_active FROM Pet WHERE pet_id = NEW.pet_id) = 1
+    ON CONFLICT(due_date) DO UPDATE SET vaccination_count = vaccination_count + 1;
+END;
+"""
+
+# Rebuild the search index from Pet and Owner
+PET_SEARCH_BACKFILL = """
+DELETE FROM PetSearch;
+INSERT INTO PetSearch (rowid, name, species, breed, microchip_number, owner_name)
+SELECT p.pet_id, p.name, p.species, p.breed, p.microchip_number, o.name
+FROM Pet p LEFT JOIN Owner o ON p.owner_id = o.owner_id;
+"""
+
+# Recompute the dashboard counters from scratch (backfill or repair)
+CLINIC_STATS_REBUILD = (
+    "DELETE FROM ClinicStats",
+    "DELETE FROM DueDateStats",
+    """
+    INSERT INTO ClinicStats (stat_name, value)
+    SELECT 'active_pets', COUNT(*) FROM Pet WHERE is_active = 1
+    UNION ALL
+    SELECT 'vaccinations', COUNT(*) FROM Vaccination
+    """,
+    """
+    INSERT INTO DueDateStats (due_date, vaccination_count)
+    SELECT v.next_due_date, COUNT(*)
+    FROM Vaccination v
+    JOIN Pet p ON v.pet_id = p.pet_id
+    WHERE v.next_due_date IS NOT NULL AND p.is_active = 1
+    GROUP BY v.next_due_date
+    """,
+)
+
+# Indexes tuned for the upcoming-vaccination and active-pet queries
+QUERY_INDEXES = """
+-- Active pets by name / registration date (listing, keyset pages, counts)
+CREATE INDEX IF NOT EXISTS idx_pet_active_name ON Pet(name) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_pet_active_registration ON Pet(registration_date) WHERE is_active = 1;
+-- Active pets by species (species distribution)
+CREATE INDEX IF NOT EXISTS idx_pet_active_species ON Pet(species) WHERE is_active = 1;
+-- Vaccination history per pet, newest first
+CREATE INDEX IF NOT EXISTS idx_vaccination_pet_date ON Vaccination(pet_id, vaccination_date);
+-- Upcoming vaccinations: range on next_due_date covering the join keys
+CREATE INDEX IF NOT EXISTS idx_vaccination_due_cover ON Vaccination(next_due_date, pet_id, vaccine_id);
+
+-- Owner(name) is a prefix of the UNIQUE(name, phone) index; the others are
+-- prefixes of, or replaced by, the indexes above
+DROP INDEX IF EXISTS idx_owner_name;
+DROP INDEX IF EXISTS idx_pet_name;
+DROP INDEX IF EXISTS idx_pet_registration;
+DROP INDEX IF EXISTS idx_vaccination_pet;
+DROP INDEX IF EXISTS idx_next_due_date;
+"""
+
+
+# Change data capture: one ChangeLog row per inserted, updated or deleted row
+# seq is AUTOINCREMENT so it keeps rising even after old entries are pruned
+CHANGE_LOG_TABLES = (
+    ("Owner", "owner_id"),
+    ("Pet", "pet_id"),
+    ("VaccineType", "vaccine_id"),
+    ("Vaccination", "vaccination_id"),
+)
+
+CHANGE_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('INSERT', 'UPDATE', 'DELETE')),
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+""" + "".join(f"""
+CREATE TRIGGER IF NOT EXISTS trg_changelog_{table.lower()}_{op.lower()} AFTER {op} ON {table}
+{f"WHEN {NOT_BULK_VACCINATION} " if (table, op) == ("Vaccination", "UPDATE") else ""}BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, op) VALUES ('{table}', {row}.{key}, '{op}');
+END;
+""" for table, key in CHANGE_LOG_TABLES
+    for op, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")))
+
+# Owner match keys for duplicate detection: digits-only phone and a lower-cased
+# name without punctuation or doubled spaces, as indexed VIRTUAL generated
+# columns so every writer keeps them current (needs SQLite 3.31+)
+# The expressions are templates so lookups can normalize a parameter the same way
+OWNER_PHONE_KEY = ("replace(replace(replace(replace(replace(replace(replace({}, "
+                "' ', ''), '-', ''), '(', ''), ')', ''), '.', ''), '+', ''), '/', '')")
+OWNER_NAME_KEY = ("lower(trim(replace(replace(replace(replace({}, "
+                "'.', ''), ',', ''), '  ', ' '), '  ', ' ')))")
+
+# SQLite's lower() only folds ASCII letters
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def owner_phone_key(phone: str) -> str:
+    # Python twin of OWNER_PHONE_KEY, for matching owners before they are stored
+    for char in " -().+/":
+        phone = phone.replace(char, "")
+    return phone
+
+
+def owner_name_key(name: str) -> str:
+    # Python twin of OWNER_NAME_KEY
+    name = name.replace(".", "").replace(",", "").replace("  ", " ").replace("  ", " ")
+    return name.strip(" ").translate(_ASCII_LOWER)
+
+OWNER_MATCH_KEYS_SCHEMA = f"""
+ALTER TABLE Owner ADD COLUMN phone_key TEXT
+GENERATED ALWAYS AS ({OWNER_PHONE_KEY.format('phone')}) VIRTUAL;
+ALTER TABLE Owner ADD COLUMN name_key TEXT
+GENERATED ALWAYS AS ({OWNER_NAME_KEY.format('name')}) VIRTUAL;
+CREATE INDEX IF NOT EXISTS idx_owner_phone_key ON Owner(phone_key);
+CREATE INDEX IF NOT EXISTS idx_owner_name_key ON Owner(name_key);
+"""
+
+# Optimistic concurrency: every UPDATE through DatabaseManager bumps row_version,
+# and versioned updates only apply when the row still has the version that was read
+ROW_VERSION_SCHEMA = """
+ALTER TABLE Owner ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE Pet ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE Vaccination ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1;
+"""
+
+# Latest dose of every (pet, vaccine) pair, kept current by triggers so overdue and
+# due-soon lookups are a range scan on idx_vaccination_status_due instead of a pass
+# over the whole vaccination history. Ties on vaccination_date go to the newer row
+VACCINATION_STATUS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS VaccinationStatus (
+    pet_id INTEGER NOT NULL,
+    vaccine_id INTEGER NOT NULL,
+    vaccination_id INTEGER NOT NULL,
+    vaccination_date DATE NOT NULL,
+    next_due_date DATE,
+    PRIMARY KEY (pet_id, vaccine_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_vaccination_status_due ON VaccinationStatus(next_due_date);
+-- Newest dose of one pair is the last entry of its range; next_due_date is left
+-- out so due-date rewrites do not have to move entries in this index too
+CREATE INDEX IF NOT EXISTS idx_vaccination_pet_vaccine_date
+ON Vaccination(pet_id, vaccine_id, vaccination_date);
+
+CREATE TRIGGER IF NOT EXISTS trg_status_vaccination_insert AFTER INSERT ON Vaccination BEGIN
+    INSERT INTO VaccinationStatus (pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date)
+    VALUES (NEW.pet_id, NEW.vaccine_id, NEW.vaccination_id, NEW.vaccination_date, NULLIF(NEW.next_due_date, ''))
+    ON CONFLICT(pet_id, vaccine_id) DO UPDATE SET
+        vaccination_id = excluded.vaccination_id,
+        vaccination_date = excluded.vaccination_date,
+        next_due_date = excluded.next_due_date
+    WHERE excluded.vaccination_date > VaccinationStatus.vaccination_date
+    OR (excluded.vaccination_date = VaccinationStatus.vaccination_date
+        AND excluded.vaccination_id > VaccinationStatus.vaccination_id);
+END;
+
+-- Only deleting a pair's latest dose changes its status (archived doses never are)
+CREATE TRIGGER IF NOT EXISTS trg_status_vaccination_delete AFTER DELETE ON Vaccination
+WHEN (SELECT vaccination_id FROM VaccinationStatus
+    WHERE pet_id = OLD.pet_id AND vaccine_id = OLD.vaccine_id) = OLD.vaccination_id BEGIN
+    DELETE FROM VaccinationStatus WHERE pet_id = OLD.pet_id AND vaccine_id = OLD.vaccine_id;
+    INSERT INTO VaccinationStatus (pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date)
+    SELECT pet_id, vaccine_id, vaccination_id, vaccination_date, NULLIF(next_due_date, '') FROM Vaccination
+    WHERE pet_id = OLD.pet_id AND vaccine_id = OLD.vaccine_id
+    ORDER BY vaccination_date DESC, vaccination_id DESC LIMIT 1;
+END;
+
+-- A new due date on the same dose is one primary key update
+CREATE TRIGGER IF NOT EXISTS trg_status_vaccination_due AFTER UPDATE OF next_due_date ON Vaccination
+WHEN OLD.pet_id = NEW.pet_id AND OLD.vaccine_id = NEW.vaccine_id
+AND OLD.vaccination_date = NEW.vaccination_date
+AND OLD.next_due_date IS NOT NEW.next_due_date
+AND """ + NOT_BULK_VACCINATION + """ BEGIN
+    UPDATE VaccinationStatus SET next_due_date = NULLIF(NEW.next_due_date, '')
+    WHERE pet_id = NEW.pet_id AND vaccine_id = NEW.vaccine_id
+    AND vaccination_id = NEW.vaccination_id;
+END;
+
+-- A dose moved to another pair or date: recompute both the old and the new pair
+CREATE TRIGGER IF NOT EXISTS trg_status_vaccination_move
+AFTER UPDATE OF pet_id, vaccine_id, vaccination_date ON Vaccination
+WHEN OLD.pet_id != NEW.pet_id OR OLD.vaccine_id != NEW.vaccine_id
+OR OLD.vaccination_date != NEW.vaccination_date BEGIN
+    DELETE FROM VaccinationStatus WHERE pet_id = OLD.pet_id AND vaccine_id = OLD.vaccine_id;
+    INSERT INTO VaccinationStatus (pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date)
+    SELECT pet_id, vaccine_id, vaccination_id, vaccination_date, NULLIF(next_due_date, '') FROM Vaccination
+    WHERE pet_id = OLD.pet_id AND vaccine_id = OLD.vaccine_id
+    ORDER BY vaccination_date DESC, vaccination_id DESC LIMIT 1;
+    DELETE FROM VaccinationStatus WHERE pet_id = NEW.pet_id AND vaccine_id = NEW.vaccine_id;
+    INSERT INTO VaccinationStatus (pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date)
+    SELECT pet_id, vaccine_id, vaccination_id, vaccination_date, NULLIF(next_due_date, '') FROM Vaccination
+    WHERE pet_id = NEW.pet_id AND vaccine_id = NEW.vaccine_id
+    ORDER BY vaccination_date DESC, vaccination_id DESC LIMIT 1;
+END;
+"""
+
+# Recompute VaccinationStatus from scratch with one window-function pass
+VACCINATION_STATUS_REBUILD = (
+    "DELETE FROM VaccinationStatus",
+    """
+    INSERT INTO VaccinationStatus (pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date)
+    SELECT pet_id, vaccine_id, vaccination_id, vaccination_date, NULLIF(next_due_date, '') FROM (
+        SELECT pet_id, vaccine_id, vaccination_id, vaccination_date, next_due_date,
+            ROW_NUMBER() OVER (
+                PARTITION BY pet_id, vaccine_id
+                ORDER BY vaccination_date DESC, vaccination_id DESC
+            ) AS dose_rank
+        FROM Vaccination
+    )
+    WHERE dose_rank = 1
+    """,
+)
+
+# Days from one dose to the next, per (species, vaccine, dose number); the protocol
+# for dose N also covers later doses until one has its own (e.g. a primary course
+# with short intervals, then a yearly booster defined once for the last dose)
+VACCINATION_PROTOCOL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS VaccinationProtocol (
+    species TEXT NOT NULL COLLATE NOCASE,
+    vaccine_id INTEGER NOT NULL,
+    dose_number INTEGER NOT NULL CHECK (dose_number >= 1),
+    interval_days INTEGER NOT NULL CHECK (interval_days >= 1),
+    -- vaccine_id first so deleting a vaccine type finds its protocols by key
+    PRIMARY KEY (vaccine_id, species, dose_number),
+    FOREIGN KEY (vaccine_id) REFERENCES VaccineType(vaccine_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+"""
+
+# Interval (days) the protocol gives a dose: a primary-key seek for the highest
+# protocol dose not above it, or NULL when the species/vaccine has no protocol
+# Format with the species, vaccine id and dose number expressions
+PROTOCOL_INTERVAL = """(
+    SELECT vp.interval_days FROM VaccinationProtocol vp
+    WHERE vp.species = {0} AND vp.vaccine_id = {1} AND vp.dose_number <= {2}
+    ORDER BY vp.dose_number DESC LIMIT 1
+)"""
+
+# Archive database (attached as "archive"): vaccinations moved out of the hot table
+# Not a numbered migration since the file is optional and attached per connection
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive.Vaccination (
+    vaccination_id INTEGER PRIMARY KEY,
+    pet_id INTEGER NOT NULL,
+    vaccine_id INTEGER NOT NULL,
+    vaccination_date DATE NOT NULL,
+    next_due_date DATE,
+    veterinarian_name TEXT,
+    batch_number TEXT,
+    dose_number INTEGER,
+    site_administered TEXT,
+    adverse_reactions TEXT,
+    notes TEXT,
+    archived_at DATE DEFAULT CURRENT_DATE
+);
+
+CREATE INDEX IF NOT EXISTS archive.idx_archive_vaccination_pet_date
+ON Vaccination(pet_id, vaccination_date);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_vaccination_date
+ON Vaccination(vaccination_date);
+"""
+
+
+def _base_schema(connection: sqlite3.Connection) -> str:
+    # Version 1: the tables and indexes in database_schema.sql
+    with open(SCHEMA_FILE, 'r') as f:
+        return f.read()
+
+
+def _pet_search(connection: sqlite3.Connection) -> str:
+    # FTS5 search index, skipped when this SQLite build lacks FTS5
+    try:
+        connection.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        connection.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError as e:
+        logger.warning("FTS5 unavailable, pet search falls back to LIKE: %s", e)
+        return ""
+    return PET_SEARCH_SCHEMA + PET_SEARCH_BACKFILL
+
+
+# (version, description, SQL script or callable returning one)
+# Append new migrations at the end; never edit one that has shipped
+MIGRATIONS: List[Tuple[int, str, Union[str, Callable[[sqlite3.Connection], str]]]] = [
+    (1, "base tables", _base_schema),
+    (2, "covering and partial indexes", QUERY_INDEXES),
+    (3, "pet search index", _pet_search),
+    (4, "dashboard statistics",
+        BULK_WRITE_SCHEMA + CLINIC_STATS_SCHEMA + ";\n".join(CLINIC_STATS_REBUILD) + ";\n"),
+    (5, "change log", CHANGE_LOG_SCHEMA),
+    (6, "owner match keys", OWNER_MATCH_KEYS_SCHEMA),
+    (7, "row versions", ROW_VERSION_SCHEMA),
+    (8, "vaccination status", VACCINATION_STATUS_SCHEMA + ";\n".join(VACCINATION_STATUS_REBUILD) + ";\n"),
+    (9, "vaccination protocols", VACCINATION_PROTOCOL_SCHEMA),
+]
+
+
+def get_version(connection: sqlite3.Connection) -> int:
+    # Schema version recorded in the database file
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    # Version a fully migrated database reports
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def split_statements(script: str) -> List[str]:
+    # Split a SQL script into complete statements (trigger bodies stay whole)
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    # A trailing statement without its semicolon still runs; trailing comments do not
+    if any(line.strip() and not line.strip().startswith('--') for line in buffer.splitlines()):
+        statements.append(buffer.strip())
+    return statements
+
+
+def migrate(connection: sqlite3.Connection) -> List[int]:
+    # Apply pending migrations in order and return the versions applied
+    # A current database costs one PRAGMA read and no DDL
+    if get_version(connection) >= latest_version():
+        return []
+
+    applied = []
+    for version, description, script in MIGRATIONS:
+        try:
+            if connection.in_transaction:
+                connection.commit()
+            # IMMEDIATE takes the write lock before re-reading the version, so a
+            # second process starting at the same time waits and then skips
+            connection.execute("BEGIN IMMEDIATE")
+            if get_version(connection) >= version:
+                connection.rollback()
+                continue
+            sql = script(connection) if callable(script) else script
+            for statement in split_statements(sql):
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {version}")
+            connection.commit()
+        except (sqlite3.Error, OSError) as e:
+            if connection.in_transaction:
+                connection.rollback()
+            raise Exception(f"Error applying migration {version} ({description}): {e}")
+        logger.info("Applied schema migration %d: %s", version, description)
+        applied.append(version)
+    return applied
@@ -1,18 +1,49 @@
 # Model Classes for Pet Clinic Vaccination Record System
 
+import re
 from datetime import datetime
 from typing import Optional
 
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def validate_email(email: str) -> bool:
+    # Validate email format
+    if not email:
+        return True  # Email is optional
+    return EMAIL_PATTERN.match(email) is not None
+
+
+def validate_phone(phone: str) -> bool:
+    # Validate phone number
+    if not phone.strip():
+        return False
+    # Allow various phone formats
+    return len(phone.strip()) >= 7
+
+
+def validate_date(value: str) -> bool:
+    # Validate an optional YYYY-MM-DD date
+    if not value:
+        return True
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
 
 class Owner:
     # Owner model class pet owner entity
     def __init__(self, owner_id: Optional[int] = None, name: str = "", 
-                phone: str = "", email: str = "", address: str = ""):
+                phone: str = "", email: str = "", address: str = "",
+                row_version: Optional[int] = None):
         self._owner_id = owner_id
         self._name = name
         self._phone = phone
         self._email = email
         self._address = address
+        self._row_version = row_version
     
     # Getters and Setters
     @property
@@ -59,6 +90,15 @@ class Owner:
     def address(self, value: str):
         self._address = value.strip()
     
+    @property
+    def row_version(self) -> Optional[int]:
+        # Version read from the database; None for records not read from it
+        return self._row_version
+    
+    @row_version.setter
+    def row_version(self, value: Optional[int]):
+        self._row_version = value
+    
     def to_dict(self) -> dict:
         # Convert Owner object to dictionary
         return {
@@ -66,7 +106,8 @@ class Owner:
             'name': self._name,
             'phone': self._phone,
             'email': self._email,
-            'address': self._address
+            'address': self._address,
+            'row_version': self._row_version
         }
     
     def __str__(self) -> str:
@@ -80,7 +121,7 @@ class Pet:
                 breed: str = "", date_of_birth: str = "", gender: str = "",
                 color: str = "", owner_id: int = 0, 
                 microchip_number: str = "", registration_date: str = "",
-                notes: str = "", is_active: int = 1):
+                notes: str = "", is_active: int = 1, row_version: Optional[int] = None):
         # Initialize Pet object with validation
         self._pet_id = pet_id
         self._name = name
@@ -94,6 +135,7 @@ class Pet:
         self._registration_date = registration_date or datetime.now().strftime("%Y-%m-%d")
         self._notes = notes
         self._is_active = is_active
+        self._row_version = row_version
     
     # Getters and Setters
     @property
@@ -198,6 +240,15 @@ class Pet:
     def is_active(self, value: int):
         self._is_active = value
     
+    @property
+    def row_version(self) -> Optional[int]:
+        # Version read from the database; None for records not read from it
+        return self._row_version
+    
+    @row_version.setter
+    def row_version(self, value: Optional[int]):
+        self._row_version = value
+    
     def to_dict(self) -> dict:
         # Convert Pet object to dictionary
         return {
@@ -212,7 +263,8 @@ class Pet:
             'microchip_number': self._microchip_number,
             'registration_date': self._registration_date,
             'notes': self._notes,
-            'is_active': self._is_active
+            'is_active': self._is_active,
+            'row_version': self._row_version
         }
     
     def __str__(self) -> str:
@@ -276,7 +328,8 @@ class Vaccination:
                 next_due_date: str = "", veterinarian_name: str = "",
                 batch_number: str = "",
                 dose_number: int = 1, site_administered: str = "",
-                adverse_reactions: str = "", notes: str = ""):
+                adverse_reactions: str = "", notes: str = "",
+                row_version: Optional[int] = None):
         # Initialize Vaccination object with validation
         self._vaccination_id = vaccination_id
         self._pet_id = pet_id
@@ -289,6 +342,7 @@ class Vaccination:
         self._site_administered = site_administered
         self._adverse_reactions = adverse_reactions
         self._notes = notes
+        self._row_version = row_version
     
     # Getters and Setters
     @property
@@ -387,6 +441,15 @@ class Vaccination:
     def notes(self, value: str):
         self._notes = value.strip()
     
+    @property
+    def row_version(self) -> Optional[int]:
+        # Version read from the database; None for records not read from it
+        return self._row_version
+    
+    @row_version.setter
+    def row_version(self, value: Optional[int]):
+        self._row_version = value
+    
     def to_dict(self) -> dict:
         # Convert Vaccination object to dictionary
         return {
@@ -400,9 +463,77 @@ class Vaccination:
             'dose_number': self._dose_number,
             'site_administered': self._site_administered,
             'adverse_reactions': self._adverse_reactions,
-            'notes': self._notes
+            'notes': self._notes,
+            'row_version': self._row_version
         }
     
     def __str__(self) -> str:
         # String representation of Vaccination
         return f"Vaccination(ID: {self._vaccination_id}, Pet ID: {self._pet_id}, Vaccine ID: {self._vaccine_id}, Date: {self._vaccination_date})"
+
+
+class VaccinationProtocol:
+    # VaccinationProtocol model class: days from one dose of a vaccine to the next for a species
+    # The protocol for dose N also applies to later doses until one of them has its own
+    def __init__(self, species: str = "", vaccine_id: int = 0, dose_number: int = 1,
+                interval_days: int = 365):
+        # Initialize VaccinationProtocol object with validation
+        self._species = species
+        self._vaccine_id = vaccine_id
+        self._dose_number = dose_number
+        self._interval_days = interval_days
+    
+    # Getters and Setters
+    @property
+    def species(self) -> str:
+        return self._species
+    
+    @species.setter
+    def species(self, value: str):
+        if not value.strip():
+            raise ValueError("Species cannot be empty")
+        self._species = value.strip()
+    
+    @property
+    def vaccine_id(self) -> int:
+        return self._vaccine_id
+    
+    @vaccine_id.setter
+    def vaccine_id(self, value: int):
+        if value <= 0:
+            raise ValueError("Vaccine ID must be a positive integer")
+        self._vaccine_id = value
+    
+    @property
+    def dose_number(self) -> int:
+        return self._dose_number
+    
+    @dose_number.setter
+    def dose_number(self, value: int):
+        if value < 1:
+            raise ValueError("Dose number must be at least 1")
+        self._dose_number = value
+    
+    @property
+    def interval_days(self) -> int:
+        return self._interval_days
+    
+    @interval_days.setter
+    def interval_days(self, value: int):
+        if value < 1:
+            raise ValueError("Interval must be at least 1 day")
+        self._interval_days = value
+    
+    def to_dict(self) -> dict:
+        # Convert VaccinationProtocol object to dictionary
+        return {
+            'species': self._species,
+            'vaccine_id': self._vaccine_id,
+            'dose_number': self._dose_number,
+            'interval_days': self._interval_days
+        }
+    
+    def __str__(self) -> str:
+        # String representation of VaccinationProtocol
+        return (f"VaccinationProtocol(Species: {self._species}, Vaccine ID: {self._vaccine_id}, "
+                f"Dose: {self._dose_number}, Interval: {self._interval_days} days)")
@@ -0,0 +1,274 @@
+# Query plan regression check for Pet Clinic Vaccination Record System
+# Seeds a throwaway database, calls every query method of DatabaseManager with
+# instrumentation on, and runs each captured statement through EXPLAIN QUERY PLAN.
+# Exits non-zero when a statement scans a whole table that should be read through
+# an index, or when a public method is neither exercised nor listed as non-query.
+#
+#   python query_plan_check.py [--verbose]
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from database import DatabaseManager
+from models import Owner, Pet, VaccineType, Vaccination, VaccinationProtocol
+
+# Methods whose statements legitimately read every row
+FULL_SCAN_ALLOWED = {
+    'read_all_pets(active_only=False)': "returns every pet, including inactive ones",
+    'iter_all_pets(active_only=False)': "streams every pet, including inactive ones",
+    'read_pets_with_owners(active_only=False)': "returns every pet, including inactive ones",
+    'read_pets_page(order_by=pet_id)': "first page walks the rowid order and stops at LIMIT",
+    'recompute_due_dates()': "reschedules every vaccination a protocol covers",
+    'recompute_due_dates(vaccine_id)': "reschedules every vaccination of one vaccine",
+}
+
+# Public methods that run no SQL of their own (or only DDL / transaction control)
+# submit_vaccination only queues: its INSERT runs on the write-behind thread's own,
+# uninstrumented connection, and is the statement create_vaccination checks
+NON_QUERY_METHODS = {
+    'checkout', 'transaction', 'in_transaction', 'snapshot', 'in_snapshot',
+    'enable_instrumentation', 'disable_instrumentation', 'query_stats', 'dump_query_stats',
+    'cache_stats', 'clear_cache', 'schema_version', 'close', 'explain_query_plan', 'has_archive',
+    'enable_write_behind', 'disable_write_behind', 'write_behind_enabled', 'flush_writes',
+    'submit_vaccination',
+}
+
+# Statements that have no query plan worth checking
+SKIPPED_STATEMENT = re.compile(r"^(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA)\b", re.IGNORECASE)
+
+# A plan step reading a table in rowid order without any index
+TABLE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+# Internal tables with one row per table, where a scan is the only plan there is
+INTERNAL_TABLES = {'sqlite_sequence'}
+
+
+def seed(db: DatabaseManager, owners: int = 200, pets_per_owner: int = 3,
+        vaccinations_per_pet: int = 3) -> dict:
+    # Fill the database with deterministic sample data and return some ids
+    rng = random.Random(42)
+    vaccine_ids = [db.create_vaccine_type(VaccineType(None, name, "Seed Labs"))
+                    for name in ("Rabies", "DHPP", "FVRCP", "Bordetella", "Leptospirosis")]
+    owner_ids, _ = db.create_owners_bulk(
+        Owner(None, f"Owner {i:04d}", f"555-{i:04d}", f"owner{i}@example.com", f"{i} Main St")
+        for i in range(owners))
+    species = ("Dog", "Cat", "Rabbit", "Bird")
+    pet_ids, _ = db.create_pets_bulk(
+        Pet(None, f"Pet {i:05d}", species[i % len(species)], "Mixed", "2020-01-01", "Male",
+            "Brown", owner_ids[i // pets_per_owner], f"CHIP{i:06d}", is_active=int(i % 10 != 0))
+        for i in range(owners * pets_per_owner))
+    today = date.today()
+    vaccination_ids, _ = db.create_vaccinations_bulk(
+        Vaccination(None, pet_id, rng.choice(vaccine_ids),
+                    (today - timedelta(days=rng.randint(0, 700))).isoformat(),
+                    (today + timedelta(days=rng.randint(-60, 365))).isoformat(),
+                    "Dr. Seed", f"B{n}")
+        for n, pet_id in enumerate(pet_ids * vaccinations_per_pet))
+    return {
+        'owner_id': owner_ids[0],
+        'pet_id': pet_ids[1],
+        'vaccine_id': vaccine_ids[0],
+        'vaccination_id': vaccination_ids[0],
+        'owner_ids': owner_ids,
+        'pet_ids': pet_ids,
+    }
+
+
+def exercises(ids: dict) -> list:
+    # (label, method name, call) for every query method; mutating calls come last
+    def first_page_key(db, order_by):
+        _, key, _ = db.read_pets_page(limit=10, order_by=order_by)
+        return key
+
+    return [
+        ('read_owner', 'read_owner', lambda db: db.read_owner(ids['owner_id'])),
+        ('find_owner', 'find_owner', lambda db: db.find_owner("Owner 0001", "555-0001")),
+        ('read_all_owners', 'read_all_owners', lambda db: db.read_all_owners()),
+        ('iter_all_owners', 'iter_all_owners', lambda db: list(db.iter_all_owners())),
+        ('read_vaccine_type', 'read_vaccine_type', lambda db: db.read_vaccine_type(ids['vaccine_id'])),
+        ('read_all_vaccine_types', 'read_all_vaccine_types', lambda db: db.read_all_vaccine_types()),
+        ('read_pet', 'read_pet', lambda db: db.read_pet(ids['pet_id'])),
+        ('find_pet_by_microchip', 'find_pet_by_microchip',
+            lambda db: db.find_pet_by_microchip("CHIP000001")),
+        ('read_all_pets', 'read_all_pets', lambda db: db.read_all_pets()),
+        ('read_all_pets(active_only=False)', 'read_all_pets',
+            lambda db: db.read_all_pets(active_only=False)),
+        ('iter_all_pets', 'iter_all_pets', lambda db: list(db.iter_all_pets())),
+        ('iter_all_pets(active_only=False)', 'iter_all_pets',
+            lambda db: list(db.iter_all_pets(active_only=False))),
+        ('read_pets_with_owners', 'read_pets_with_owners', lambda db: db.read_pets_with_owners()),
+        ('read_pets_with_owners(active_only=False)', 'read_pets_with_owners',
+            lambda db: db.read_pets_with_owners(active_only=False)),
+        ('read_pets_page(order_by=name)', 'read_pets_page',
+            lambda db: db.read_pets_page(first_page_key(db, 'name'), limit=10,
+                                        order_by='name', include_total=True)),
+        ('read_pets_page(order_by=pet_id)', 'read_pets_page',
+            lambda db: db.read_pets_page(first_page_key(db, 'pet_id'), limit=10,
+                                        order_by='pet_id')),
+        ('read_pets_page(order_by=registration_date)', 'read_pets_page',
+            lambda db: db.read_pets_page(first_page_key(db, 'registration_date'), limit=10,
+                                        order_by='registration_date')),
+        ('search_pets', 'search_pets', lambda db: db.search_pets("Pet 001")),
+        ('search_pets_with_owners', 'search_pets_with_owners',
+            lambda db: db.search_pets_with_owners("Owner 0001", limit=20)),
+        ('search_pets_ranked', 'search_pets_ranked',
+            lambda db: db.search_pets_ranked("Pet 002", limit=20)),
+        ('read_vaccination', 'read_vaccination', lambda db: db.read_vaccination(ids['vaccination_id'])),
+        ('read_vaccinations_by_pet', 'read_vaccinations_by_pet',
+            lambda db: db.read_vaccinations_by_pet(ids['pet_id'])),
+        ('read_vaccinations_with_vaccine', 'read_vaccinations_with_vaccine',
+            lambda db: db.read_vaccinations_with_vaccine(ids['pet_id'])),
+        ('read_vaccinations_by_pet(include_archive=True)', 'read_vaccinations_by_pet',
+            lambda db: db.read_vaccinations_by_pet(ids['pet_id'], include_archive=True)),
+        ('read_vaccinations_with_vaccine(include_archive=True)', 'read_vaccinations_with_vaccine',
+            lambda db: db.read_vaccinations_with_vaccine(ids['pet_id'], include_archive=True)),
+        ('read_all_vaccinations', 'read_all_vaccinations', lambda db: db.read_all_vaccinations()),
+        ('read_all_vaccinations(include_archive=True)', 'read_all_vaccinations',
+            lambda db: db.read_all_vaccinations(include_archive=True)),
+        ('iter_all_vaccinations', 'iter_all_vaccinations', lambda db: list(db.iter_all_vaccinations())),
+        ('iter_all_vaccinations(include_archive=True)', 'iter_all_vaccinations',
+            lambda db: list(db.iter_all_vaccinations(include_archive=True))),
+        ('get_upcoming_vaccinations', 'get_upcoming_vaccinations',
+            lambda db: db.get_upcoming_vaccinations(30)),
+        ('get_pet_count', 'get_pet_count', lambda db: db.get_pet_count()),
+        ('get_vaccination_count', 'get_vaccination_count', lambda db: db.get_vaccination_count()),
+        ('get_vaccination_count(include_archive=True)', 'get_vaccination_count',
+            lambda db: db.get_vaccination_count(include_archive=True)),
+        ('get_vaccination_statuses', 'get_vaccination_statuses',
+            lambda db: db.get_vaccination_statuses(30)),
+        ('get_vaccination_statuses(overdue)', 'get_vaccination_statuses',
+            lambda db: db.get_vaccination_statuses(30, ("overdue",), limit=20)),
+        ('get_vaccination_statuses(due_soon)', 'get_vaccination_statuses',
+            lambda db: db.get_vaccination_statuses(30, ("due_soon",))),
+        ('get_vaccination_status_counts', 'get_vaccination_status_counts',
+            lambda db: db.get_vaccination_status_counts(30)),
+        ('save_vaccination_protocol', 'save_vaccination_protocol',
+            lambda db: db.save_vaccination_protocol(VaccinationProtocol("Dog", ids['vaccine_id'], 1, 21))),
+        ('read_vaccination_protocols', 'read_vaccination_protocols',
+            lambda db: db.read_vaccination_protocols("Dog", ids['vaccine_id'])),
+        ('compute_next_due_date', 'compute_next_due_date',
+            lambda db: db.compute_next_due_date("Dog", ids['vaccine_id'], 2, date.today().isoformat())),
+        ('recompute_due_dates()', 'recompute_due_dates', lambda db: db.recompute_due_dates()),
+        ('recompute_due_dates(vaccine_id)', 'recompute_due_dates',
+            lambda db: db.recompute_due_dates(vaccine_id=ids['vaccine_id'])),
+        ('delete_vaccination_protocol', 'delete_vaccination_protocol',
+            lambda db: db.delete_vaccination_protocol("Dog", ids['vaccine_id'], 1)),
+        ('get_upcoming_vaccination_count', 'get_upcoming_vaccination_count',
+            lambda db: db.get_upcoming_vaccination_count(30)),
+        ('get_dashboard_stats', 'get_dashboard_stats', lambda db: db.get_dashboard_stats(30)),
+        ('get_species_distribution', 'get_species_distribution',
+            lambda db: db.get_species_distribution()),
+        ('rebuild_stats', 'rebuild_stats', lambda db: db.rebuild_stats()),
+        ('archive_vaccinations', 'archive_vaccinations', lambda db: db.archive_vaccinations(365)),
+        ('changes_since', 'changes_since', lambda db: db.changes_since(10, limit=100)),
+        ('changes_since(tables)', 'changes_since',
+            lambda db: db.changes_since(10, tables=("Owner", "VaccineType"))),
+        ('latest_change_seq', 'latest_change_seq', lambda db: db.latest_change_seq()),
+        ('changes_pruned_since', 'changes_pruned_since', lambda db: db.changes_pruned_since(10)),
+        ('iter_owner_blocks(phone_key)', 'iter_owner_blocks',
+            lambda db: list(db.iter_owner_blocks("phone_key"))),
+        ('iter_owner_blocks(name_key)', 'iter_owner_blocks',
+            lambda db: list(db.iter_owner_blocks("name_key"))),
+        ('sync_cache', 'sync_cache', lambda db: db.sync_cache()),
+        # Writes
+        ('create_owner', 'create_owner',
+            lambda db: db.create_owner(Owner(None, "Plan Check", "555-0000"))),
+        ('create_owners_bulk', 'create_owners_bulk',
+            lambda db: db.create_owners_bulk([Owner(None, "Plan Bulk", "555-0001")])),
+        ('create_vaccine_type', 'create_vaccine_type',
+            lambda db: db.create_vaccine_type(VaccineType(None, "Plan Vaccine", "Plan Labs"))),
+        ('create_pet', 'create_pet',
+            lambda db: db.create_pet(Pet(None, "Plan Pet", "Dog", owner_id=ids['owner_id']))),
+        ('create_pets_bulk', 'create_pets_bulk',
+            lambda db: db.create_pets_bulk([Pet(None, "Plan Bulk Pet", "Cat", owner_id=ids['owner_id']),
+                                            Pet(None, "Plan Orphan Pet", "Cat", owner_id=-1)])),
+        ('create_vaccination', 'create_vaccination',
+            lambda db: db.create_vaccination(Vaccination(None, ids['pet_id'], ids['vaccine_id'],
+                                                        date.today().isoformat()))),
+        ('create_vaccinations_bulk', 'create_vaccinations_bulk',
+            lambda db: db.create_vaccinations_bulk([Vaccination(None, ids['pet_id'], ids['vaccine_id'],
+                                                                date.today().isoformat())])),
+        ('update_owner', 'update_owner',
+            lambda db: db.update_owner(db.read_owner(ids['owner_id']))),
+        ('update_vaccine_type', 'update_vaccine_type',
+            lambda db: db.update_vaccine_type(db.read_vaccine_type(ids['vaccine_id']))),
+        ('update_pet', 'update_pet', lambda db: db.update_pet(db.read_pet(ids['pet_id']))),
+        ('update_vaccination', 'update_vaccination',
+            lambda db: db.update_vaccination(db.read_vaccination(ids['vaccination_id']))),
+        ('soft_delete_pet', 'soft_delete_pet', lambda db: db.soft_delete_pet(ids['pet_ids'][2])),
+        ('delete_vaccination', 'delete_vaccination',
+            lambda db: db.delete_vaccination(ids['vaccination_id'])),
+        ('delete_pet', 'delete_pet', lambda db: db.delete_pet(ids['pet_ids'][3])),
+        ('delete_owner', 'delete_owner', lambda db: db.delete_owner(ids['owner_ids'][-1])),
+        ('merge_owners', 'merge_owners',
+            lambda db: db.merge_owners([(ids['owner_ids'][5], ids['owner_ids'][6])])),
+        ('delete_vaccine_type', 'delete_vaccine_type',
+            lambda db: db.delete_vaccine_type(db.create_vaccine_type(VaccineType(None, "Unused")))),
+        ('prune_changes', 'prune_changes', lambda db: db.prune_changes(10)),
+    ]
+
+
+def table_scans(plan: list) -> list:
+    # Plan steps that read a whole table without an index
+    scans = [(detail, TABLE_SCAN.match(detail)) for detail in plan]
+    return [detail for detail, scan in scans if scan and scan.group(1) not in INTERNAL_TABLES]
+
+
+def check(db: DatabaseManager, ids: dict, verbose: bool = False) -> list:
+    # Run every exercise and return a list of failure messages
+    stats = db.enable_instrumentation(slow_query_ms=float('inf'))
+    failures = []
+    covered = set()
+
+    for label, method_name, call in exercises(ids):
+        covered.add(method_name)
+        stats.reset()
+        call(db)
+        statements = [sql for sql in stats.snapshot()['statements']
+                    if not SKIPPED_STATEMENT.match(sql)]
+        if verbose:
+            print(f"{label}:")
+        for sql in statements:
+            plan = db.explain_query_plan(sql, (None,) * sql.count('?'))
+            scans = table_scans(plan)
+            if verbose:
+                print(f"    {sql[:100]}")
+                for detail in plan:
+                    print(f"        {detail}")
+            if scans and label not in FULL_SCAN_ALLOWED:
+                failures.append(f"{label}: full table scan ({'; '.join(scans)}) in: {sql}")
+
+    db.disable_instrumentation()
+    public = {name for name in dir(DatabaseManager)
+            if not name.startswith('_') and callable(getattr(DatabaseManager, name))}
+    for name in sorted(public - covered - NON_QUERY_METHODS):
+        failures.append(f"{name}: not exercised; add it to exercises() or NON_QUERY_METHODS")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check DatabaseManager query plans for full table scans")
+    parser.add_argument('--verbose', action='store_true', help="print every statement and its plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'plan_check.db'),
+                            archive_path=os.path.join(tmp, 'plan_check_archive.db'))
+        try:
+            failures = check(db, seed(db), args.verbose)
+        finally:
+            db.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(failures)} query plan problem(s)" if failures else "All query plans use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
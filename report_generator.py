@@ -8,8 +8,8 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
-from typing import List
-from models import Pet, Vaccination
+from typing import List, Optional, Tuple
+from models import Pet, Owner, Vaccination, VaccineType
 import os
 
 
@@ -56,8 +56,10 @@ class ReportGenerator:
             textColor=colors.HexColor('#2C3E50')
         )
     
-    def generate_pet_report(self, pet: Pet, vaccinations: List[Vaccination], db) -> str:
+    def generate_pet_report(self, pet: Pet, vaccinations: List[Tuple[Vaccination, Optional[VaccineType]]],
+                        db) -> str:
         # Generate comprehensive pet report with vaccination history
+        # vaccinations comes from db.read_vaccinations_with_vaccine(pet.pet_id)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"pet_report_{pet.name.replace(' ', '_')}_{timestamp}.pdf"
         filepath = os.path.join(self.output_folder, filename)
@@ -128,8 +130,7 @@ class ReportGenerator:
         
         if vaccinations:
             vacc_data = [['Date', 'Vaccine', 'Next Due', 'Veterinarian', 'Dose']]
-            for vacc in vaccinations:
-                vaccine = db.read_vaccine_type(vacc.vaccine_id)
+            for vacc, vaccine in vaccinations:
                 vaccine_name = vaccine.vaccine_name if vaccine else 'Unknown'
                 vacc_data.append([
                     vacc.vaccination_date,
@@ -178,8 +179,9 @@ class ReportGenerator:
         doc.build(story)
         return filepath
     
-    def generate_all_pets_report(self, pets: List[Pet], db) -> str:
+    def generate_all_pets_report(self, pets: List[Tuple[Pet, Optional[Owner]]]) -> str:
         # Generate report of all pets
+        # pets comes from db.read_pets_with_owners()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"all_pets_report_{timestamp}.pdf"
         filepath = os.path.join(self.output_folder, filename)
@@ -200,8 +202,7 @@ class ReportGenerator:
         # Pets Table
         if pets:
             pet_data = [['ID', 'Name', 'Species', 'Breed', 'Owner', 'Phone']]
-            for pet in pets:
-                owner = db.read_owner(pet.owner_id)
+            for pet, owner in pets:
                 pet_data.append([
                     str(pet.pet_id),
                     pet.name,
@@ -0,0 +1,126 @@
+# Multi-clinic sharding for Pet Clinic Vaccination Record System
+# Each clinic (branch) keeps its own database file; calls are routed by clinic id
+# and cross-clinic reads fan out to every shard in parallel and are merged
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database import DUE_STATUSES, DatabaseManager
+from models import Owner, Pet
+
+
+class ShardedDatabaseManager:
+    # Owns one DatabaseManager per clinic database file
+    def __init__(self, shards: Dict[str, str], pool_size: int = 2, profile="durable",
+                cache_size: int = 0, max_workers: Optional[int] = None):
+        # shards maps clinic id -> database file; every shard gets its own connection pool
+        # so fan-out queries run on separate connections with independent locks
+        if not shards:
+            raise ValueError("At least one clinic database is required")
+        if pool_size < 1:
+            raise ValueError("Sharded mode needs pool_size >= 1 for parallel fan-out")
+        self._shards = {}
+        for clinic_id, db_name in shards.items():
+            self._shards[clinic_id] = DatabaseManager(db_name, pool_size=pool_size,
+                                                    profile=profile, cache_size=cache_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self._shards),
+                                            thread_name_prefix="shard")
+
+    @property
+    def clinic_ids(self) -> List[str]:
+        return list(self._shards)
+
+    def shard(self, clinic_id: str) -> DatabaseManager:
+        # DatabaseManager for one clinic; CRUD calls for that clinic go through it
+        try:
+            return self._shards[clinic_id]
+        except KeyError:
+            raise Exception(f"Unknown clinic: {clinic_id}")
+
+    def close(self):
+        # Stop the fan-out workers and close every shard
+        self._executor.shutdown(wait=True)
+        for db in self._shards.values():
+            db.close()
+
+    # FAN-OUT
+
+    def fan_out(self, call: Callable[[DatabaseManager], object]) -> Dict[str, object]:
+        # Run call(db) on every shard in parallel, each on a pooled connection
+        def run(db):
+            with db.checkout():
+                return call(db)
+
+        futures = {clinic_id: self._executor.submit(run, db)
+                    for clinic_id, db in self._shards.items()}
+        return {clinic_id: future.result() for clinic_id, future in futures.items()}
+
+    def search_pets_with_owners(self, search_term: str, limit: Optional[int] = None
+                                ) -> List[Tuple[str, Pet, Optional[Owner]]]:
+        # Search every clinic and merge the matches on (rank, pet name), the order each
+        # shard already returns, so the top limit stays the best-ranked matches overall
+        results = self.fan_out(lambda db: db.search_pets_ranked(search_term, limit))
+        merged = list(islice(heapq.merge(
+            *[[(rank, clinic_id, pet, owner) for rank, pet, owner in ranked]
+            for clinic_id, ranked in results.items()],
+            key=lambda item: (item[0], item[2].name)
+        ), limit))
+        return [(clinic_id, pet, owner) for _, clinic_id, pet, owner in merged]
+
+    def search_pets(self, search_term: str, limit: Optional[int] = None) -> List[Tuple[str, Pet]]:
+        # Search every clinic for pets, tagged with their clinic id
+        return [(clinic_id, pet) for clinic_id, pet, _ in
+                self.search_pets_with_owners(search_term, limit)]
+
+    def get_upcoming_vaccinations(self, days: int = 30) -> List[tuple]:
+        # Upcoming vaccinations of every clinic as (clinic_id, pet, vaccine, due date, owner, phone)
+        results = self.fan_out(lambda db: db.get_upcoming_vaccinations(days))
+        return list(heapq.merge(
+            *[[(clinic_id,) + tuple(row) for row in rows] for clinic_id, rows in results.items()],
+            key=lambda row: row[3]
+        ))
+
+    def get_vaccination_statuses(self, days: int = 30,
+                                statuses: Tuple[str, ...] = ("overdue", "due_soon"),
+                                limit: Optional[int] = None) -> List[tuple]:
+        # Latest-dose statuses of every clinic, tagged with the clinic id, soonest due first
+        results = self.fan_out(lambda db: db.get_vaccination_statuses(days, statuses, limit))
+        merged = list(heapq.merge(
+            *[[(clinic_id,) + tuple(row) for row in rows] for clinic_id, rows in results.items()],
+            key=lambda row: (row[3] is None, row[3] or "")
+        ))
+        return merged[:limit] if limit is not None else merged
+
+    def get_vaccination_status_counts(self, days: int = 30) -> dict:
+        # Summed (pet, vaccine) pairs per status plus the per-clinic breakdown
+        by_clinic = self.fan_out(lambda db: db.get_vaccination_status_counts(days))
+        totals = {status: sum(counts[status] for counts in by_clinic.values())
+                for status in DUE_STATUSES}
+        totals['by_clinic'] = by_clinic
+        return totals
+
+    def get_pet_count(self) -> int:
+        # Active pets across all clinics
+        return sum(self.fan_out(lambda db: db.get_pet_count()).values())
+
+    def get_vaccination_count(self) -> int:
+        # Vaccinations across all clinics
+        return sum(self.fan_out(lambda db: db.get_vaccination_count()).values())
+
+    def get_dashboard_stats(self, days: int = 30) -> dict:
+        # Summed dashboard counters plus the per-clinic breakdown
+        by_clinic = self.fan_out(lambda db: db.get_dashboard_stats(days))
+        totals = {key: sum(stats[key] for stats in by_clinic.values())
+                for key in ('pet_count', 'vaccination_count', 'upcoming_count')}
+        totals['by_clinic'] = by_clinic
+        return totals
+
+    def get_species_distribution(self) -> List[Tuple[str, int]]:
+        # Pets per species across all clinics, most common first
+        counts = {}
+        for rows in self.fan_out(lambda db: db.get_species_distribution()).values():
+            for species, count in rows:
+                counts[species] = counts.get(species, 0) + count
+        return sorted(counts.items(), key=lambda item: -item[1])
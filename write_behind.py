@@ -0,0 +1,135 @@
+# Write-behind queue for Pet Clinic Vaccination Record System
+# Callers enqueue INSERTs and get a Future for the new row id straight away; a
+# dedicated writer thread groups queued inserts into one transaction per batch,
+# so a burst of saves costs one commit (and one fsync) instead of one each
+
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from queue import Queue, Empty
+from time import monotonic
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Queue entry that stops the writer thread once everything before it is written
+_STOP = object()
+
+
+class WriteBehindWriter:
+    # Owns one connection and the thread that writes through it
+    def __init__(self, factory: Callable[[], sqlite3.Connection], max_batch: int = 100,
+                max_delay: float = 0.05):
+        # factory opens a connection usable from another thread (check_same_thread=False)
+        # A batch is written once it holds max_batch inserts or max_delay seconds
+        # after its first insert arrived, whichever comes first
+        if max_batch < 1:
+            raise ValueError("Batch size must be at least 1")
+        if max_delay < 0:
+            raise ValueError("Batch delay cannot be negative")
+        self._connection = factory()
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._queue = Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        # Approximate number of queued entries not yet taken by the writer
+        return self._queue.qsize()
+
+    def submit(self, query: str, params: tuple) -> Future:
+        # Queue one INSERT; the Future resolves to its row id after the batch commits
+        # or raises if the row was rejected (constraint) or the batch failed
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise Exception("Write-behind queue is closed")
+            self._queue.put((query, params, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None):
+        # Block until everything queued before this call is committed
+        marker = Future()
+        with self._lock:
+            if self._closed:
+                return
+            self._queue.put((None, None, marker))
+        try:
+            marker.result(timeout)
+        except FutureTimeoutError:
+            raise Exception(f"Timed out flushing {self.pending} queued write(s)")
+
+    def close(self, timeout: Optional[float] = None):
+        # Write everything still queued, then stop the thread and close the connection
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise Exception("Timed out waiting for the write-behind thread to finish")
+        self._connection.close()
+
+    def _run(self):
+        # Writer thread: collect a batch, write it, repeat until stopped
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            deadline = monotonic() + self._max_delay
+            inserts = 0 if batch[0] is _STOP or batch[0][0] is None else 1
+            # A flush marker or the stop entry closes the batch early
+            while inserts < self._max_batch and batch[-1] is not _STOP and batch[-1][0] is not None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                batch.append(entry)
+                if entry is not _STOP and entry[0] is not None:
+                    inserts += 1
+            if batch[-1] is _STOP:
+                stop = True
+                batch.pop()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list):
+        # Run one batch in a single transaction and resolve its futures
+        results = []
+        markers = [future for query, _, future in batch if query is None]
+        try:
+            self._connection.execute("BEGIN")
+            for query, params, future in batch:
+                if query is None:
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    cursor = self._connection.execute(query, params)
+                    results.append((future, cursor.lastrowid, None))
+                except sqlite3.IntegrityError as e:
+                    # Only this statement is rolled back; the rest of the batch stands
+                    results.append((future, None, Exception(f"Error creating record: {e}")))
+            self._connection.commit()
+        except sqlite3.Error as e:
+            if self._connection.in_transaction:
+                self._connection.rollback()
+            logger.error("Write-behind batch of %d entries failed: %s", len(batch), e)
+            error = Exception(f"Error writing batch: {e}")
+            results = [(future, None, error) for query, _, future in batch
+                        if query is not None and not future.cancelled()]
+        for future, row_id, error in results:
+            if error is None:
+                future.set_result(row_id)
+            else:
+                future.set_exception(error)
+        for marker in markers:
+            marker.set_result(None)